@@ -6,6 +6,8 @@ This example shows how the assistant breaks down complex tasks and executes them
 import os
 import sys
 import asyncio
+import shutil
+from pathlib import Path
 
 # Add parent directory to path to import modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -41,9 +43,8 @@ async def demonstrate_multi_step_reasoning():
     ]
     
     for file in test_files:
-        file_path = os.path.join(test_dir, file)
-        with open(file_path, "w") as f:
-            f.write(f"This is a dummy file for {file}")
+        # One write syscall per file instead of buffered open/write/close
+        Path(test_dir, file).write_text(f"This is a dummy file for {file}")
     
     print(f"Created {len(test_files)} test files in {test_dir}")
     
@@ -77,19 +78,10 @@ async def demonstrate_multi_step_reasoning():
             if step.is_completed:
                 print(f"Result: {step.result[:100]}..." if len(str(step.result)) > 100 else f"Result: {step.result}")
     
-    # Clean up
+    # Clean up: one recursive removal covers the test files and the
+    # Finance directory if the task created it
     print("\nCleaning up...")
-    for file in os.listdir(test_dir):
-        os.remove(os.path.join(test_dir, file))
-    
-    # Remove the Finance directory if it was created
-    finance_dir = os.path.join(test_dir, "Finance")
-    if os.path.exists(finance_dir):
-        for file in os.listdir(finance_dir):
-            os.remove(os.path.join(finance_dir, file))
-        os.rmdir(finance_dir)
-    
-    os.rmdir(test_dir)
+    shutil.rmtree(test_dir, ignore_errors=True)
     print(f"Removed test directory and all files")
 
 if __name__ == "__main__":
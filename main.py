@@ -4,5 +4,14 @@
 import asyncio
 from src.core.main import main
 
+# uvloop (pip install uvloop, Linux/macOS) swaps in a libuv-based event
+# loop that is markedly faster for the HTTP-heavy OpenAI/TTS traffic this
+# assistant runs on. It's optional - the stdlib loop is used when absent.
+try:
+    import uvloop
+    uvloop.install()
+except ImportError:
+    pass
+
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
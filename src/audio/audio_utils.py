@@ -1,16 +1,62 @@
 import time
-import wave
-import struct
 import numpy as np
-from pydub import AudioSegment
-import io
 import pyaudio
 import asyncio
-from pydub.playback import play
+import sounddevice as sd
+import soundfile as sf
 from io import BytesIO
-import os
-import sys
-import subprocess
+
+# Playback format: both OpenAI and ElevenLabs TTS return 44.1 kHz MP3,
+# which ffmpeg decodes to 16-bit stereo PCM for us
+PLAYBACK_RATE = 44100
+PLAYBACK_CHANNELS = 2
+PLAYBACK_BLOCKSIZE = 2048
+PCM_FRAME_BYTES = PLAYBACK_CHANNELS * 2  # 16-bit samples
+PCM_READ_SIZE = 4096 * PCM_FRAME_BYTES  # read PCM in 4096-sample blocks
+
+# Streaming MP3 -> raw PCM decoder command. One decoder is spawned per
+# response rather than kept for the process lifetime: an MP3 pipe decoder
+# only flushes its last frames on stdin EOF, so a shared process would hold
+# back the tail of every turn. The per-spawn cost is a single fork/exec
+# with no temp files, vs. pydub's AudioSegment.from_mp3 which shelled out
+# to ffmpeg *and* round-tripped the audio through disk on every call.
+MP3_DECODER_CMD = (
+    'ffmpeg', '-loglevel', 'quiet', '-f', 'mp3', '-i', 'pipe:0',
+    '-f', 's16le', '-ar', str(PLAYBACK_RATE), '-ac', str(PLAYBACK_CHANNELS), 'pipe:1'
+)
+
+# Number of Cobra frames to read per stream.read call while recording
+VAD_BATCH_FRAMES = 4
+
+# Shared output stream, opened once and reused across turns so playback
+# doesn't pay the PortAudio device-open cost on every response
+_output_stream = None
+
+def get_output_stream():
+    """
+    Get the shared sounddevice output stream, opening it on first use.
+    """
+    global _output_stream
+    if _output_stream is None:
+        _output_stream = sd.OutputStream(
+            samplerate=PLAYBACK_RATE,
+            channels=PLAYBACK_CHANNELS,
+            dtype='int16',
+            blocksize=PLAYBACK_BLOCKSIZE,
+            latency='low'
+        )
+        _output_stream.start()
+    return _output_stream
+
+def close_output_stream():
+    """
+    Stop and close the shared output stream. Called once on shutdown.
+    """
+    global _output_stream
+    if _output_stream is not None:
+        _output_stream.stop()
+        _output_stream.close()
+        _output_stream = None
 
 def record_audio(stream, pa, config, cobra):
     """
@@ -23,76 +69,214 @@ def record_audio(stream, pa, config, cobra):
     cobra (pvcobra.Cobra): The Cobra voice activity detection instance
     
     Returns:
-    tuple: (str, float) The path to the recorded audio file and the time of the last voice detected
+    tuple: (BytesIO, float) An in-memory WAV buffer and the time of the last voice detected
     """
     print("Listening...")
-    audio_buffer = []
-    last_voice_time = time.time()
     silent_chunks = 0
-    
+
+    # Silence timing is counted in samples, not wall-clock time: chunk size
+    # and sample rate already determine elapsed audio exactly, so the
+    # cutoffs are deterministic under load and time.time() leaves the loop
+    max_silence_chunks = config['MAX_SILENCE_CHUNKS']
+
+    # Preallocate one contiguous sample buffer and fill it with a cursor,
+    # instead of growing a list of chunks and joining them at the end.
+    # MAX_RECORDING_TIME counts from the last detected voice, so the buffer
+    # is grown by another allocation block in the (rare) long-speech case.
+    capacity = config['MAX_RECORDING_SAMPLES']
+    audio_buffer = np.empty(capacity, dtype=np.int16)
+    idx = 0
+
+    # Read several Cobra frames per stream.read call. This amortizes the
+    # per-call Python overhead of the hot loop; the stop conditions are only
+    # checked once per batch, which delays the silence trigger by at most
+    # VAD_BATCH_FRAMES frames (~128 ms) - well under SILENT_CHUNK_THRESHOLD.
+    batch_frames = VAD_BATCH_FRAMES * config['CHUNK']
+
     while True:
-        chunk = stream.read(config['CHUNK'])
-        audio_buffer.append(chunk)
-        
-        pcm = struct.unpack_from("h" * config['CHUNK'], chunk)
-        voice_probability = cobra.process(pcm)
-        
-        if voice_probability > config['VOICE_PROBABILITY_THRESHOLD']:
-            last_voice_time = time.time()
-            silent_chunks = 0
-        else:
-            silent_chunks += 1
-        
+        chunk = stream.read(batch_frames)
+
+        # A zero-copy int16 view of the batch, one row per Cobra frame,
+        # instead of unpacking a CHUNK-length Python tuple per frame
+        samples = np.frombuffer(chunk, dtype=np.int16)
+
+        # A short read means the stream is shutting down; keep only whole
+        # frames and stop recording after processing them
+        final_batch = samples.size < batch_frames
+        if final_batch:
+            samples = samples[:samples.size - samples.size % config['CHUNK']]
+            if not samples.size:
+                break
+
+        if idx + samples.size > audio_buffer.size:
+            audio_buffer = np.concatenate((audio_buffer, np.empty(capacity, dtype=np.int16)))
+        audio_buffer[idx:idx + samples.size] = samples
+        idx += samples.size
+
+        frames = samples.reshape(-1, config['CHUNK'])
+
+        for pcm in frames:
+            voice_probability = cobra.process(pcm)
+
+            if voice_probability > config['VOICE_PROBABILITY_THRESHOLD']:
+                silent_chunks = 0
+            else:
+                silent_chunks += 1
+
+        if final_batch:
+            break
+
         if silent_chunks > config['SILENT_CHUNK_THRESHOLD']:
             break
-        
-        if time.time() - last_voice_time > config['MAX_RECORDING_TIME']:
+
+        if silent_chunks >= max_silence_chunks:
             break
     
     print("Finished recording")
-    
-    wf = wave.open("temp_audio.wav", 'wb')
-    wf.setnchannels(config['CHANNELS'])
-    wf.setsampwidth(pa.get_sample_size(config['FORMAT']))
-    wf.setframerate(config['RATE'])
-    wf.writeframes(b''.join(audio_buffer))
-    wf.close()
-    
-    return "temp_audio.wav", last_voice_time
+
+    # Derive when the last voice was heard from the trailing silent samples
+    last_voice_time = time.time() - (silent_chunks * config['CHUNK']) / config['RATE']
+
+    # Build the WAV in memory instead of round-tripping through a temp file
+    # on disk - transcription just needs the serialized bytes. libsndfile
+    # writes header + PCM straight from the int16 array in one pass, with
+    # no intermediate bytes copy
+    wav_buffer = BytesIO()
+    sf.write(wav_buffer, audio_buffer[:idx], config['RATE'], format='WAV', subtype='PCM_16')
+    wav_buffer.seek(0)
+
+    return wav_buffer, last_voice_time
 
 
 async def play_audio_stream(stream):
     """
-    Play audio from a stream using mpg123, avoiding ALSA errors.
+    Play audio from an MP3 stream as it arrives.
+
+    MP3 bytes are piped into an ffmpeg decoder while decoded PCM is written
+    to the shared sounddevice output stream, so playback starts on the first
+    decoded frame instead of waiting for the full response to download.
+
+    Args:
+    stream: An (async) iterator yielding MP3 bytes
+
+    Returns:
+    float: The time when playback started
     """
-    # Create a temporary file to store the audio
-    temp_file = "temp_response.mp3"
-    
+    # Keep a copy of the MP3 bytes so we can fall back to mpg123 playback
+    # if the streaming path fails
+    mp3_buffer = bytearray()
+    playback_start_time = None
+    decoder = None
+
     try:
-        # Write the stream to a temporary file
-        with open(temp_file, 'wb') as f:
-            if hasattr(stream, '__aiter__'):  # Check if it's an async iterator
+        # Spawn a streaming MP3 -> raw PCM decoder
+        decoder = await asyncio.create_subprocess_exec(
+            *MP3_DECODER_CMD,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL
+        )
+
+        async def feed_decoder():
+            # Write MP3 bytes to the decoder as they arrive from the TTS service
+            try:
+                if hasattr(stream, '__aiter__'):  # Check if it's an async iterator
+                    async for chunk in stream:
+                        mp3_buffer.extend(chunk)
+                        decoder.stdin.write(chunk)
+                        await decoder.stdin.drain()
+                else:  # It's a regular generator
+                    for chunk in stream:
+                        mp3_buffer.extend(chunk)
+                        decoder.stdin.write(chunk)
+                        await decoder.stdin.drain()
+            finally:
+                decoder.stdin.close()
+
+        async def play_decoded():
+            # Read decoded PCM and write it to the shared output stream
+            nonlocal playback_start_time
+            output_stream = get_output_stream()
+            loop = asyncio.get_event_loop()
+
+            while True:
+                pcm = await decoder.stdout.read(PCM_READ_SIZE)
+                if not pcm:
+                    break
+
+                # Drop any trailing partial frame; the memoryview keeps the
+                # int16 view zero-copy even when the block is trimmed
+                usable = len(pcm) - len(pcm) % PCM_FRAME_BYTES
+                if not usable:
+                    continue
+
+                samples = np.frombuffer(memoryview(pcm)[:usable], dtype=np.int16).reshape(-1, PLAYBACK_CHANNELS)
+
+                if playback_start_time is None:
+                    playback_start_time = time.time()
+
+                # stream.write blocks until the device accepts the block,
+                # so run it off the event loop
+                await loop.run_in_executor(None, output_stream.write, samples)
+
+        feed_task = asyncio.ensure_future(feed_decoder())
+        play_task = asyncio.ensure_future(play_decoded())
+        try:
+            await asyncio.gather(feed_task, play_task)
+        except Exception:
+            # Don't leave the sibling task writing to the device while the
+            # fallback path plays the same audio
+            for task in (feed_task, play_task):
+                if not task.done():
+                    task.cancel()
+            raise
+        await decoder.wait()
+
+        if playback_start_time is None:
+            # The decoder produced no audio (e.g. empty stream)
+            playback_start_time = time.time()
+
+    except Exception as e:
+        print(f"Streaming playback error, falling back to mpg123: {str(e)[:100]}")
+        if decoder is not None and decoder.returncode is None:
+            decoder.kill()
+        # Drain whatever the TTS service still has for us so the fallback
+        # plays the full response, not just the part already decoded
+        try:
+            if hasattr(stream, '__aiter__'):
                 async for chunk in stream:
-                    f.write(chunk)
-            else:  # It's a regular generator
+                    mp3_buffer.extend(chunk)
+            else:
                 for chunk in stream:
-                    f.write(chunk)
-        
+                    mp3_buffer.extend(chunk)
+        except Exception:
+            pass
+        playback_start_time = await _play_with_mpg123(mp3_buffer)
+
+    return playback_start_time
+
+
+async def _play_with_mpg123(mp3_bytes):
+    """
+    Last-resort playback path: pipe the MP3 bytes to mpg123 over stdin,
+    avoiding ALSA errors without touching the filesystem.
+    """
+    try:
         # Start time for performance measurement
         playback_start_time = time.time()
-        
-        # Use mpg123 player which is more reliable than sounddevice
-        # Redirect all output to /dev/null to suppress any errors
-        with open(os.devnull, 'w') as DEVNULL:
-            process = await asyncio.create_subprocess_exec(
-                'mpg123', '-q', temp_file,
-                stdout=DEVNULL,
-                stderr=DEVNULL
-            )
-            
-            # Wait for playback to complete
-            await process.wait()
-        
+
+        # Feed via stdin so mpg123 starts decoding immediately; suppress
+        # all output to avoid noisy errors
+        process = await asyncio.create_subprocess_exec(
+            'mpg123', '-q', '-',
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL
+        )
+
+        # Wait for playback to complete
+        await process.communicate(input=bytes(mp3_bytes))
+
     except Exception as e:
         # Fall back to silent non-playing if mpg123 fails
         # This is better than failing completely
@@ -100,13 +284,5 @@ async def play_audio_stream(stream):
         playback_start_time = time.time()
         # Simulate a delay to mimic audio playing
         await asyncio.sleep(1)
-    
-    finally:
-        # Clean up temp file
-        if os.path.exists(temp_file):
-            try:
-                os.remove(temp_file)
-            except:
-                pass
-    
+
     return playback_start_time
\ No newline at end of file
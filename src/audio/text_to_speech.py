@@ -2,6 +2,7 @@
 
 import os
 import asyncio
+from functools import lru_cache
 from dotenv import load_dotenv
 from openai import AsyncOpenAI
 from elevenlabs import VoiceSettings
@@ -12,9 +13,43 @@ load_dotenv()
 # Initialize OpenAI client
 openai_client = AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'))
 
+@lru_cache(maxsize=4)
+def _elevenlabs_client(api_key):
+    """
+    Shared ElevenLabs client per API key. Building one per call creates a
+    new HTTP client and pays a TLS handshake before the first TTS byte
+    arrives; a few cache slots cover configs that switch keys.
+    """
+    return ElevenLabs(api_key=api_key)
+
+@lru_cache(maxsize=8)
+def _voice_settings(stability, similarity_boost):
+    """Reuse VoiceSettings instances for repeated (stability, boost) pairs"""
+    return VoiceSettings(
+        stability=stability,
+        similarity_boost=similarity_boost,
+    )
+
 # Choose which service to use (set to False to use ElevenLabs)
 USE_OPENAI = True
 
+async def warm_connection():
+    """
+    Pre-establish the DNS/TLS session to the TTS endpoint so the first
+    spoken response doesn't pay a cold handshake. Failures are ignored.
+    """
+    try:
+        if USE_OPENAI:
+            await openai_client.models.list()
+        else:
+            # The ElevenLabs SDK client connects lazily; a cheap authenticated
+            # call warms its connection pool
+            loop = asyncio.get_event_loop()
+            client = _elevenlabs_client(os.getenv('ELEVEN_LABS_API_KEY'))
+            await loop.run_in_executor(None, client.models.get_all)
+    except Exception:
+        pass
+
 async def text_to_speech_stream(text, config=None):
     if USE_OPENAI:
         return await openai_tts_stream(text)
@@ -22,16 +57,25 @@ async def text_to_speech_stream(text, config=None):
         return await elevenlabs_tts_stream(text, config)
 
 async def openai_tts_stream(text):
-    response = await openai_client.audio.speech.create(
-        model="tts-1",
-        voice="alloy",
-        input=text
-    )
-    return response.iter_bytes(chunk_size=4096)  # This returns a regular generator
+    # Stream the MP3 bytes as OpenAI generates them instead of awaiting the
+    # full response first - playback can begin on the first frame
+    async def stream():
+        async with openai_client.audio.speech.with_streaming_response.create(
+            model="tts-1",
+            voice="alloy",
+            # Pinned: the playback pipeline feeds these bytes to an MP3
+            # decoder, so the format must not float with SDK defaults
+            response_format="mp3",
+            input=text
+        ) as response:
+            async for chunk in response.iter_bytes(chunk_size=4096):
+                yield chunk
+
+    return stream()  # This returns an async generator
 
 # Code to use this function when switching to ElevenLabs
 async def elevenlabs_tts_stream(text, config=None):
-    eleven_labs_client = ElevenLabs(api_key=os.getenv('ELEVEN_LABS_API_KEY') if config is None else config['ELEVEN_LABS_API_KEY'])
+    eleven_labs_client = _elevenlabs_client(os.getenv('ELEVEN_LABS_API_KEY') if config is None else config['ELEVEN_LABS_API_KEY'])
     # Note: ElevenLabs doesn't have an async API, so we'll run it in a thread pool
     loop = asyncio.get_event_loop()
     
@@ -55,8 +99,5 @@ async def elevenlabs_tts_stream(text, config=None):
         optimize_streaming_latency=optimize_streaming_latency,
         output_format="mp3_44100_128",
         text=text,
-        voice_settings=VoiceSettings(
-            stability=stability,
-            similarity_boost=similarity_boost,
-        ),
+        voice_settings=_voice_settings(stability, similarity_boost),
     ))
\ No newline at end of file
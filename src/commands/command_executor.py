@@ -1,11 +1,18 @@
 import asyncio
+import codecs
+import logging
+import signal
 import subprocess
 import os
 import re
 import shlex
+from collections import deque
+from functools import lru_cache
 from typing import List, Dict, Optional, Any, Tuple, Union
 from src.core.reasoning import ReasoningStep
 
+logger = logging.getLogger(__name__)
+
 # List of potentially dangerous command patterns
 DANGEROUS_PATTERNS = [
     r"rm\s+(-[rf]+\s+)?/",            # rm commands targeting root
@@ -17,6 +24,11 @@ DANGEROUS_PATTERNS = [
     r":(){:|:&};:",                   # fork bomb
 ]
 
+# All dangerous patterns compiled into one alternation at import time, so
+# verification does a single C-level scan instead of one re.search per
+# pattern. The named groups identify which pattern matched for reporting.
+_DANGEROUS_RE = re.compile("|".join(f"(?P<p{i}>{p})" for i, p in enumerate(DANGEROUS_PATTERNS)))
+
 # List of safe command categories
 SAFE_COMMAND_CATEGORIES = {
     "file_operations": ["ls", "cp", "mv", "mkdir", "touch", "cat", "head", "tail", "find", "grep"],
@@ -26,72 +38,182 @@ SAFE_COMMAND_CATEGORIES = {
     "net_tools": ["ping", "wget", "curl"]
 }
 
+# All safe base commands flattened into one set at import time (plus echo
+# and printf, which were special-cased inline), so the verifier does a
+# single hash lookup instead of scanning every category per command
+_SAFE_COMMANDS = frozenset(
+    command for commands in SAFE_COMMAND_CATEGORIES.values() for command in commands
+) | {"echo", "printf"}
+
+# Cap on captured subprocess output; commands that exceed it are killed
+# and their output marked as truncated
+MAX_OUTPUT_BYTES = 4 * 1024 * 1024
+
+# The user's home directory never changes within a run; expanduser hits
+# the environment (and possibly passwd) each call, so resolve it once
+_HOME_DIR = os.path.expanduser("~")
+
+# Shell metacharacters that require /bin/sh; anything without them can be
+# exec'd directly, saving the shell's fork+exec and parse per command
+_SHELL_META = re.compile(r"[|&;<>()$`\\\"'*?\[\]#~=%\n]")
+
+@lru_cache(maxsize=32)
+def _approved_prefixes(approved_dirs: Tuple[str, ...]) -> Tuple[str, ...]:
+    """
+    Build the prefix tuple for a set of approved directories. The approved
+    set rarely changes between commands, so the cache makes repeat
+    verifications a single dict lookup instead of rebuilding the prefixes.
+    """
+    return tuple(d.rstrip("/") + "/" for d in approved_dirs)
+
+def _kill_process_tree(process):
+    """
+    Kill a spawned command and its children. The shell wrapper is its own
+    session leader (start_new_session), so killing the process group takes
+    down the actual command too, not just /bin/sh.
+    """
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError, OSError):
+        try:
+            process.kill()
+        except ProcessLookupError:
+            pass
+
+async def _read_stream_capped(stream, process) -> Tuple[str, bool]:
+    """
+    Read a subprocess stream incrementally, decoding as it arrives and
+    stopping at MAX_OUTPUT_BYTES.
+
+    Unlike communicate(), this never holds the full raw bytes plus a full
+    decoded copy in memory, and it bounds runaway output. On truncation the
+    process is killed immediately so the reader on the other pipe sees EOF
+    instead of blocking forever.
+
+    Returns:
+        Tuple of (decoded_text, truncated)
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    parts = []
+    total = 0
+
+    while True:
+        chunk = await stream.read(65536)
+        if not chunk:
+            break
+
+        total += len(chunk)
+        if total >= MAX_OUTPUT_BYTES:
+            parts.append(decoder.decode(chunk[:MAX_OUTPUT_BYTES - (total - len(chunk))]))
+            _kill_process_tree(process)
+            return ''.join(parts), True
+
+        parts.append(decoder.decode(chunk))
+
+    parts.append(decoder.decode(b'', True))
+    return ''.join(parts), False
+
+@lru_cache(maxsize=2048)
+def _is_dangerous_cached(command: str) -> Tuple[bool, str]:
+    """
+    Check if a command contains dangerous patterns.
+
+    Reasoning plans re-issue identical commands often, and the check is a
+    pure function of the command string, so results are memoized.
+
+    Args:
+        command: The command to check
+
+    Returns:
+        Tuple of (is_dangerous, reason)
+    """
+    logger.debug("Verificando comando: %s", command)
+
+    # Check against dangerous patterns
+    match = _DANGEROUS_RE.search(command)
+    if match:
+        pattern = DANGEROUS_PATTERNS[int(match.lastgroup[1:])]
+        logger.warning("Comando peligroso (patrón %s): %s", pattern, command)
+        return True, f"Command matches dangerous pattern: {pattern}"
+
+    # Get the base command (first word)
+    base_command = command.strip().split()[0] if command.strip() else ""
+
+    # Special case for mkdir and mv which are essential for our file operations
+    if base_command in ["mkdir", "mv", "cp"]:
+        # These are essential commands that we need to allow
+        logger.debug("Comando permitido (esencial): %s", command)
+        return False, ""
+
+    # Check if it's in our list of safe commands
+    if base_command not in _SAFE_COMMANDS:
+        logger.warning("Comando no en lista permitida: %s", base_command)
+        return True, f"Command '{base_command}' is not in the allowed command list"
+
+    # Additional specific checks
+    if ">" in command and ("/etc/" in command or "/var/" in command):
+        logger.warning("Comando intenta escribir a directorios del sistema: %s", command)
+        return True, "Command attempts to write to system directories"
+
+    if "|" in command and any(cmd in command for cmd in ["nohup", "daemon", "&", "disown"]):
+        logger.warning("Comando intenta ejecución en segundo plano con pipes: %s", command)
+        return True, "Command attempts to background execution with pipes"
+
+    logger.debug("Comando verificado y permitido: %s", command)
+    return False, ""
+
 class CommandVerifier:
     """
     Verifies the safety of commands before execution
     """
-    
+
     @staticmethod
     def is_dangerous(command: str) -> Tuple[bool, str]:
         """
         Check if a command contains dangerous patterns
-        
+
         Args:
             command: The command to check
-            
+
         Returns:
             Tuple of (is_dangerous, reason)
         """
-        # Logging for debugging
-        print(f"Verificando comando: {command}")
-        
-        # Check against dangerous patterns
-        for pattern in DANGEROUS_PATTERNS:
-            if re.search(pattern, command):
-                print(f"⚠️ Comando peligroso (patrón {pattern}): {command}")
-                return True, f"Command matches dangerous pattern: {pattern}"
-        
-        # Get the base command (first word)
-        base_command = command.strip().split()[0] if command.strip() else ""
-        
-        # Special case for mkdir and mv which are essential for our file operations
-        if base_command in ["mkdir", "mv", "cp"]:
-            # These are essential commands that we need to allow
-            print(f"✅ Comando permitido (esencial): {command}")
-            return False, ""
-        
-        # Check if it's in our list of safe commands
-        is_in_safe_list = False
-        for category, commands in SAFE_COMMAND_CATEGORIES.items():
-            if base_command in commands:
-                is_in_safe_list = True
-                break
-        
-        if not is_in_safe_list and base_command not in ["echo", "printf"]:
-            print(f"⚠️ Comando no en lista permitida: {base_command}")
-            return True, f"Command '{base_command}' is not in the allowed command list"
-        
-        # Additional specific checks
-        if ">" in command and ("/etc/" in command or "/var/" in command):
-            print(f"⚠️ Comando intenta escribir a directorios del sistema: {command}")
-            return True, "Command attempts to write to system directories"
-        
-        if "|" in command and any(cmd in command for cmd in ["nohup", "daemon", "&", "disown"]):
-            print(f"⚠️ Comando intenta ejecución en segundo plano con pipes: {command}")
-            return True, "Command attempts to background execution with pipes"
-        
-        print(f"✅ Comando verificado y permitido: {command}")    
-        return False, ""
+        return _is_dangerous_cached(command)
     
     @staticmethod
-    def verify_command_with_context(command: str, context: Dict) -> Tuple[bool, str]:
+    def prepare_approved_dirs(context: Dict) -> Tuple[str, ...]:
+        """
+        Resolve the approved-directory tuple for a verification context.
+
+        Batches share one context, so callers can compute this once and
+        pass it to verify_command_with_context for every command.
+
+        Args:
+            context: Contextual information
+
+        Returns:
+            Tuple of approved directories, home dir included
+        """
+        approved_dirs = list(context.get("approved_directories", []))
+
+        # Consider the user's home directory as approved
+        if _HOME_DIR not in approved_dirs:
+            approved_dirs.append(_HOME_DIR)
+
+        return tuple(approved_dirs)
+
+    @staticmethod
+    def verify_command_with_context(command: str, context: Dict,
+                                    approved_dirs: Optional[Tuple[str, ...]] = None) -> Tuple[bool, str]:
         """
         Verify a command with additional context information
-        
+
         Args:
             command: The command to verify
             context: Contextual information
-            
+            approved_dirs: Pre-resolved approved directories; computed from
+                the context when not supplied
+
         Returns:
             Tuple of (is_safe, reason)
         """
@@ -99,48 +221,49 @@ class CommandVerifier:
         is_dangerous, reason = CommandVerifier.is_dangerous(command)
         if is_dangerous:
             return False, reason
-        
+
         # Check if file operations target only approved directories
         if any(cmd in command.split() for cmd in ["cp", "mv", "rm", "mkdir", "touch"]):
-            # Get approved directories from context
-            approved_dirs = context.get("approved_directories", [])
-            
-            # Debug info
-            print(f"Directorios aprobados: {approved_dirs}")
-            
-            # Consider the user's home directory as approved
-            home_dir = os.path.expanduser("~")
-            if home_dir not in approved_dirs:
-                approved_dirs.append(home_dir)
-                print(f"Añadido directorio home: {home_dir}")
-            
-            # Extract paths from the command
+            if approved_dirs is None:
+                approved_dirs = CommandVerifier.prepare_approved_dirs(context)
+
+            logger.debug("Directorios aprobados: %s", approved_dirs)
+
+            # str.startswith with a tuple does the whole scan in C instead
+            # of a per-dir Python loop; the tuple itself is cached across
+            # commands that share the same approved set
+            approved_prefixes = _approved_prefixes(approved_dirs)
+
+            # Extract paths from the command. Most commands carry no
+            # quoting, so plain str.split covers them in C; shlex's
+            # pure-Python state machine only runs when quotes or escapes
+            # are actually present
             try:
-                words = shlex.split(command)
+                if '"' in command or "'" in command or "\\" in command:
+                    words = shlex.split(command)
+                else:
+                    words = command.split()
                 paths = [w for w in words[1:] if not w.startswith("-") and "/" in w]
-                
-                print(f"Paths extraídos del comando: {paths}")
-                
+
+                logger.debug("Paths extraídos del comando: %s", paths)
+
+                # Resolve the working directory once; abspath would call
+                # getcwd() again for every relative argument
+                cwd = os.getcwd()
+
                 # Check if all paths are within approved directories
                 for path in paths:
                     if not path.startswith("/"):
                         # Convert relative path to absolute
-                        abs_path = os.path.abspath(path)
-                        print(f"Convertido path relativo: {path} -> {abs_path}")
+                        abs_path = os.path.normpath(os.path.join(cwd, path))
+                        logger.debug("Convertido path relativo: %s -> %s", path, abs_path)
                         path = abs_path
-                        
-                    is_approved = False
-                    for approved_dir in approved_dirs:
-                        if path == approved_dir or path.startswith(approved_dir + "/"):
-                            is_approved = True
-                            print(f"✅ Path aprobado: {path} (en {approved_dir})")
-                            break
-                    
-                    if not is_approved:
-                        print(f"⚠️ Path no aprobado: {path}")
+
+                    if path not in approved_dirs and not path.startswith(approved_prefixes):
+                        logger.warning("Path no aprobado: %s", path)
                         return False, f"Command targets unapproved directory: {path}"
             except Exception as e:
-                print(f"⚠️ Error al analizar rutas en comando: {str(e)}")
+                logger.debug("Error al analizar rutas en comando: %s", e)
                 # Be permissive in case of parsing errors, since we've already passed basic safety checks
                 pass
         
@@ -154,17 +277,20 @@ class CommandExecutor:
     def __init__(self):
         """Initialize the command executor"""
         self.verifier = CommandVerifier()
-        self.command_history = []
+        # Bounded so long agent sessions don't grow history without limit
+        self.command_history = deque(maxlen=1024)
         self.unsafe_attempt_count = 0
     
-    async def execute_command(self, command: str, context: Optional[Dict] = None) -> Dict:
+    async def execute_command(self, command: str, context: Optional[Dict] = None,
+                              approved_dirs: Optional[Tuple[str, ...]] = None) -> Dict:
         """
         Execute a shell command with safety verification
-        
+
         Args:
             command: The command to execute
             context: Optional execution context
-            
+            approved_dirs: Pre-resolved approved directories for batch calls
+
         Returns:
             Dictionary with execution results
         """
@@ -177,7 +303,7 @@ class CommandExecutor:
         
         # Verify command safety
         context = context or {}
-        is_safe, reason = self.verifier.verify_command_with_context(command, context)
+        is_safe, reason = self.verifier.verify_command_with_context(command, context, approved_dirs)
         
         if not is_safe:
             self.unsafe_attempt_count += 1
@@ -188,28 +314,52 @@ class CommandExecutor:
         self.command_history.append(command)
         
         try:
-            # Execute the command
-            process = await asyncio.create_subprocess_shell(
-                command,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
+            # Execute the command. Plain commands (no shell metacharacters)
+            # are exec'd directly, skipping the /bin/sh wrapper
+            argv = command.split() if not _SHELL_META.search(command) else None
+            if argv:
+                process = await asyncio.create_subprocess_exec(
+                    *argv,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    start_new_session=True
+                )
+            else:
+                process = await asyncio.create_subprocess_shell(
+                    command,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    start_new_session=True
+                )
+
+            # Stream both pipes with a size cap instead of buffering the
+            # full output twice via communicate() + decode()
+            (stdout, out_truncated), (stderr, err_truncated) = await asyncio.gather(
+                _read_stream_capped(process.stdout, process),
+                _read_stream_capped(process.stderr, process)
             )
-            stdout, stderr = await process.communicate()
-            
+
+            truncated = out_truncated or err_truncated
+            await process.wait()
+
             # Process result
             if stdout:
-                result["output"] = stdout.decode()
+                result["output"] = stdout
                 result["success"] = True
             elif stderr:
-                result["output"] = f"Error: {stderr.decode()}"
-                result["error"] = stderr.decode()
+                result["output"] = f"Error: {stderr}"
+                result["error"] = stderr
             else:
                 result["output"] = "Command executed successfully, but there was no output."
                 result["success"] = True
-                
+
+            if truncated:
+                result["output"] += "\n[output truncated]"
+
             # Add return code
             result["return_code"] = process.returncode
-            
+            result["truncated"] = truncated
+
             return result
             
         except Exception as e:
@@ -217,33 +367,51 @@ class CommandExecutor:
             result["output"] = f"Error executing command: {str(e)}"
             return result
     
-    async def execute_commands(self, commands: List[str], context: Optional[Dict] = None) -> Dict:
+    async def execute_commands(self, commands: List[str], context: Optional[Dict] = None,
+                               concurrent: bool = False) -> Dict:
         """
         Execute multiple commands
-        
+
         Args:
             commands: List of commands to execute
             context: Optional execution context
-            
+            concurrent: Run the commands in parallel subprocesses. Only safe
+                when the commands are independent of each other; results are
+                still returned in input order.
+
         Returns:
             Dictionary with combined execution results
         """
-        results = []
+        # Resolve the approved directories once for the whole batch
+        approved_dirs = self.verifier.prepare_approved_dirs(context or {})
+
+        if concurrent and len(commands) > 1:
+            # Bound the parallelism to the core count so a large plan
+            # doesn't fork everything at once
+            semaphore = asyncio.Semaphore(os.cpu_count() or 4)
+
+            async def run_one(cmd):
+                async with semaphore:
+                    return await self.execute_command(cmd, context, approved_dirs)
+
+            results = list(await asyncio.gather(*(run_one(cmd) for cmd in commands)))
+        else:
+            results = []
+            for cmd in commands:
+                results.append(await self.execute_command(cmd, context, approved_dirs))
+
         all_success = True
-        combined_output = ""
-        
-        for cmd in commands:
-            result = await self.execute_command(cmd, context)
-            results.append(result)
-            
+        output_parts = []
+
+        for cmd, result in zip(commands, results):
             if not result["success"]:
                 all_success = False
-            
-            combined_output += f"Command: {cmd}\n{result['output']}\n\n"
-        
+
+            output_parts.append(f"Command: {cmd}\n{result['output']}")
+
         return {
             "success": all_success,
-            "output": combined_output.strip(),
+            "output": "\n\n".join(output_parts),
             "commands": commands,
             "individual_results": results
         }
@@ -295,32 +463,43 @@ class CommandExecutor:
             result["output"] = f"Error starting background command: {str(e)}"
             return result
     
-    def generate_command(self, action: str, files: List[Dict], target_dir: str) -> str:
+    def generate_command(self, action: str, files: List[Dict], target_dir: str,
+                         chunk_size: int = 100) -> List[str]:
         """
-        Generate a command based on an action and file list
-        
+        Generate commands based on an action and file list
+
+        Files are split into chunks of chunk_size paths per command so a
+        huge search result can't blow past the kernel's argv size limit
+        (E2BIG), and the chunks can be executed concurrently.
+
         Args:
             action: The action to perform (e.g., "move", "copy", "delete")
             files: List of files to operate on
             target_dir: Target directory for operations
-            
+            chunk_size: Maximum number of file paths per generated command
+
         Returns:
-            Generated command string
+            List of generated command strings (empty if nothing to do)
         """
         if not files:
-            return ""
-            
-        file_paths = [f'"{file["path"]}"' for file in files]
-        file_paths_str = " ".join(file_paths)
-        
+            return []
+
+        # shlex.quote handles paths containing quotes, $, spaces, etc.,
+        # where the previous naive f'"{path}"' wrapping broke
+        chunks = [
+            " ".join(shlex.quote(file["path"]) for file in files[i:i + chunk_size])
+            for i in range(0, len(files), chunk_size)
+        ]
+        target = shlex.quote(target_dir)
+
         if action == "move":
-            return f'mkdir -p "{target_dir}" && mv {file_paths_str} "{target_dir}"'
+            return [f'mkdir -p {target}'] + [f'mv {chunk} {target}' for chunk in chunks]
         elif action == "copy":
-            return f'mkdir -p "{target_dir}" && cp {file_paths_str} "{target_dir}"'
+            return [f'mkdir -p {target}'] + [f'cp {chunk} {target}' for chunk in chunks]
         elif action == "delete":
-            return f'rm {file_paths_str}'
+            return [f'rm {chunk}' for chunk in chunks]
         else:
-            return ""
+            return []
     
     async def execute_step(self, step: ReasoningStep, context: Dict) -> Dict:
         """
@@ -348,10 +527,10 @@ class CommandExecutor:
         if action and "files" in step_args and "target_dir" in step_args:
             files = step_args["files"]
             target_dir = step_args["target_dir"]
-            
-            command = self.generate_command(action, files, target_dir)
-            if command:
-                return await self.execute_command(command, context)
+
+            generated = self.generate_command(action, files, target_dir)
+            if generated:
+                return await self.execute_commands(generated, context)
         
         return {
             "success": False,
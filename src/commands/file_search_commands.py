@@ -7,10 +7,14 @@ This module provides command-line interface for file search operations.
 import os
 import json
 import argparse
+from collections import Counter
+from itertools import islice
 from typing import Dict, List, Optional
 
-from src.utils.directory_indexer import directory_indexer
-from src.nlp.file_search import file_search_manager
+# directory_indexer and file_search_manager are imported inside each command
+# instead of at module load: both read their on-disk config and build API
+# clients on import, which would make every merlin_files invocation
+# (including --help) pay that cost up front.
 
 class FileSearchCommands:
     """
@@ -28,6 +32,7 @@ class FileSearchCommands:
         Returns:
             Result information
         """
+        from src.nlp.file_search import file_search_manager
         directory = args.directory
         vector_store = args.vector_store or "default"
         max_depth = args.max_depth
@@ -65,6 +70,7 @@ class FileSearchCommands:
         Returns:
             Result information
         """
+        from src.nlp.file_search import file_search_manager
         list_type = args.type or "all"
         
         if list_type == "dirs" or list_type == "all":
@@ -106,6 +112,7 @@ class FileSearchCommands:
         Returns:
             Result information
         """
+        from src.utils.directory_indexer import directory_indexer
         directory = args.directory
         
         if not directory:
@@ -132,6 +139,7 @@ class FileSearchCommands:
         Returns:
             Search results
         """
+        from src.nlp.file_search import file_search_manager
         query = args.query
         vector_store = args.vector_store or "default"
         max_results = args.max_results or 5
@@ -193,6 +201,7 @@ class FileSearchCommands:
         Returns:
             Status information
         """
+        from src.utils.directory_indexer import directory_indexer
         print("\nIndexing Status:")
         
         summary = directory_indexer.get_index_summary()
@@ -217,22 +226,20 @@ class FileSearchCommands:
                 print(f"    Files: {file_count}")
                 print(f"    Subdirectories: {dir_count}")
                 
-                # Show file types distribution
+                # Show file types distribution; Counter tallies in C and
+                # most_common() already returns the sorted histogram
                 if file_count > 0:
-                    file_types = {}
-                    for file in dir_info.get("files", []):
-                        file_type = file.get("category", "unknown")
-                        if file_type not in file_types:
-                            file_types[file_type] = 0
-                        file_types[file_type] += 1
-                    
+                    file_types = Counter(
+                        file.get("category", "unknown") for file in dir_info.get("files", [])
+                    )
+
                     print(f"    File types:")
-                    for file_type, count in sorted(file_types.items(), key=lambda x: x[1], reverse=True):
+                    for file_type, count in file_types.most_common():
                         print(f"      {file_type}: {count}")
-                    
+
                     # Show some sample files
                     print(f"\n    Sample files (first 5):")
-                    for i, file in enumerate(dir_info.get("files", [])[:5], 1):
+                    for i, file in enumerate(islice(dir_info.get("files", []), 5), 1):
                         print(f"      {i}. {file.get('name', 'Unknown')}")
         
         return {"success": True}
@@ -248,6 +255,7 @@ class FileSearchCommands:
         Returns:
             Result information
         """
+        from src.utils.directory_indexer import directory_indexer
         if not args.force:
             confirm = input("\nAre you sure you want to clear all indices? This cannot be undone. (y/N): ")
             if confirm.lower() != 'y':
@@ -0,0 +1,52 @@
+"""
+Value Normalization Module
+
+Converts arbitrary context values into JSON-serializable primitives in a
+single walk, instead of the dumps-then-loads roundtrip sometimes used to
+coerce types. Unknown objects fall back to str().
+"""
+
+import datetime
+import decimal
+import uuid
+from collections import deque
+from pathlib import PurePath
+from typing import Any
+
+def normalize_value(value: Any) -> Any:
+    """
+    Normalize a value into JSON-serializable primitives
+
+    Args:
+        value: The value to normalize
+
+    Returns:
+        A structure of dicts, lists, strings, numbers, bools and None
+    """
+    # Fast path for the types json handles natively
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+
+    if isinstance(value, dict):
+        return {str(k): normalize_value(v) for k, v in value.items()}
+
+    if isinstance(value, (list, tuple, set, frozenset, deque)):
+        return [normalize_value(v) for v in value]
+
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+
+    if isinstance(value, uuid.UUID):
+        return str(value)
+
+    if isinstance(value, PurePath):
+        return str(value)
+
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode('utf-8', errors='replace')
+
+    # Anything else gets its string form rather than failing serialization
+    return str(value)
@@ -1,15 +1,23 @@
 import os
-from dotenv import load_dotenv
+from functools import lru_cache
 
+@lru_cache(maxsize=1)
 def load_config():
     """
     Load configuration from environment variables.
+
+    The result is cached: repeat calls return the same dict without
+    re-parsing .env or re-converting every value. Use
+    load_config.cache_clear() to force a re-read.
     """
-    # Load environment variables from .env file
+    # Load environment variables from .env file. dotenv is imported here
+    # rather than at module load so entry points that never read the config
+    # don't pay the import cost.
+    from dotenv import load_dotenv
     load_dotenv()
 
     # Create a dictionary with all configuration parameters
-    return {
+    config = {
         # API keys
         'OPENAI_API_KEY': os.getenv('OPENAI_API_KEY'),  # Used for OpenAI API (transcription and AI response)
         'PICOVOICE_ACCESS_KEY': os.getenv('PICOVOICE_ACCESS_KEY'),  # Used for wake word detection
@@ -33,12 +41,28 @@ def load_config():
         'SILENT_CHUNK_THRESHOLD': int(os.getenv('SILENT_CHUNK_THRESHOLD')),
         'MAX_RECORDING_TIME': int(os.getenv('MAX_RECORDING_TIME')),
 
-        # Sample questions for simulation mode
-        'SAMPLE_QUESTIONS': os.getenv('SAMPLE_QUESTIONS').split(','),
+        # Response caching (opt-in): replay identical or near-identical
+        # turns without re-running the model - and without re-running any
+        # commands behind the cached answer, hence off by default
+        'CACHE_RESPONSES': os.getenv('CACHE_RESPONSES', '').lower() in ('1', 'true', 'yes'),
+        'CACHE_THRESHOLD': float(os.getenv('CACHE_THRESHOLD', '0.9')),
+
+        # Sample questions for simulation mode, as an immutable tuple so
+        # the cached config can be shared safely
+        'SAMPLE_QUESTIONS': tuple(
+            q.strip() for q in os.getenv('SAMPLE_QUESTIONS', '').split(',') if q.strip()
+        ),
 
         # Audio configuration
         'CHUNK': 512,  # Number of frames per buffer
         'FORMAT': 8,  # 8 corresponds to pyaudio.paInt16
         'CHANNELS': 1,  # Mono audio
         'RATE': 16000,  # Sample rate (Hz)
-    }
\ No newline at end of file
+    }
+
+    # Derived audio constants, computed once here instead of per call in
+    # the recording hot path
+    config['MAX_RECORDING_SAMPLES'] = config['MAX_RECORDING_TIME'] * config['RATE']
+    config['MAX_SILENCE_CHUNKS'] = config['MAX_RECORDING_SAMPLES'] // config['CHUNK']
+
+    return config
\ No newline at end of file
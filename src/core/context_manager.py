@@ -6,25 +6,74 @@ allowing for state persistence and information sharing across steps
 in the multi-step reasoning system.
 """
 
+import asyncio
 import os
 import json
+import re
+import sys
 import time
+from collections import ChainMap, OrderedDict, deque
+from collections.abc import Mapping
 from typing import Dict, List, Any, Optional, Set, Tuple, Union
 
+from src.core._normalize import normalize_value
+from src.utils import fastjson
 from src.utils.directory_manager import directory_manager
 
+# Cap on entries kept per reasoning context; the oldest unpinned entries
+# are evicted first, keeping memory bounded for long-running chains
+MAX_CONTEXT_ENTRIES = 512
+
+# Keys that must never be evicted: the stable system facts and the
+# rolling "latest" values that later steps rely on
+PINNED_KEYS = {"approved_directories", "current_directory"}
+PINNED_PREFIXES = ("last_", "command_history")
+
+# Matches each file operation in a (possibly compound) command line:
+# the operation token anchored at a command boundary, its flags, and its
+# arguments. One compiled scan replaces the old substring/split cascade,
+# which also misfired on substrings like "notmkdir".
+_FILE_OP_RE = re.compile(r'(?:^|[;&|]\s*)(mkdir|mv|cp)\b((?:\s+-\S+)*)\s*([^;&|]*)')
+
+class _ValueView(Mapping):
+    """
+    Read-only mapping of context keys to entry values.
+
+    Delegates lookups to the live entry map instead of materializing a
+    full dict copy, so handing "all values" to a consumer is O(1).
+    """
+
+    __slots__ = ("_entries",)
+
+    def __init__(self, entries):
+        self._entries = entries
+
+    def __getitem__(self, key):
+        return self._entries[key].value
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+
 class ContextEntry:
     """Represents a single entry in the reasoning context"""
-    
-    def __init__(self, 
-                 key: str, 
-                 value: Any, 
-                 source: str, 
+
+    # Chains create thousands of entries; slots avoid a per-instance
+    # __dict__ and make attribute access a fixed-offset lookup
+    __slots__ = ("key", "value", "source", "timestamp", "metadata", "access_count")
+
+    def __init__(self,
+                 key: str,
+                 value: Any,
+                 source: str,
                  timestamp: Optional[float] = None,
                  metadata: Optional[Dict] = None):
         """
         Initialize a context entry
-        
+
         Args:
             key: Unique identifier for this entry
             value: The value to store
@@ -34,11 +83,15 @@ class ContextEntry:
         """
         self.key = key
         self.value = value
-        self.source = source
+        # The same handful of source strings repeats across thousands of
+        # entries; interning collapses them to one object each
+        self.source = sys.intern(source)
         self.timestamp = timestamp or time.time()
-        self.metadata = metadata or {}
+        # Kept as None when absent so entries without metadata don't each
+        # allocate an empty dict
+        self.metadata = metadata
         self.access_count = 0
-        
+
     def to_dict(self) -> Dict:
         """Convert to dictionary representation"""
         return {
@@ -46,7 +99,7 @@ class ContextEntry:
             "value": self.value,
             "source": self.source,
             "timestamp": self.timestamp,
-            "metadata": self.metadata,
+            "metadata": self.metadata or {},
             "access_count": self.access_count
         }
         
@@ -81,41 +134,103 @@ class ReasoningContext:
             chain_id: ID of the reasoning chain this context belongs to
         """
         self.chain_id = chain_id
-        self.entries: Dict[str, ContextEntry] = {}
-        self.initialize_default_context()
-    
+        # Ordered by recency of insertion/access so eviction is O(1) LRU
+        self.entries: "OrderedDict[str, ContextEntry]" = OrderedDict()
+        # Step results in execution order, so per-step context assembly can
+        # slice instead of probing step_result_{i} keys one by one
+        self.step_results: List[Any] = []
+        # Monotonic counter tagging each recorded result; epoch-second key
+        # suffixes collided when two results landed in the same second
+        self._seq = 0
+        # Reverse index so get_by_source never scans every entry
+        self._source_index: Dict[str, Set[str]] = {}
+
     def initialize_default_context(self) -> None:
-        """Initialize with default context entries"""
-        # Add accessible directories
-        self.set("approved_directories", 
-                 directory_manager.get_all_directories(), 
-                 "system", 
-                 metadata={"description": "List of directories that are approved for access"})
-        
-        # Add current working directory
-        self.set("current_directory",
-                 os.getcwd(),
-                 "system",
-                 metadata={"description": "Current working directory"})
+        """
+        Ensure the default context entries exist.
+
+        Called lazily on first read instead of at chain creation, so
+        chains that never consult these keys (e.g. plans that fail before
+        executing) skip the getcwd and directory lookups entirely.
+        """
+        if "approved_directories" not in self.entries:
+            # Add accessible directories as a list of paths - the command
+            # verifier consumes this entry, and the prompt-formatted string
+            # from get_all_directories would be iterated character by
+            # character there
+            self.set("approved_directories",
+                     list(directory_manager.directories.values()),
+                     "system",
+                     metadata={"description": "List of directories that are approved for access"})
+
+        if "current_directory" not in self.entries:
+            # Add current working directory
+            self.set("current_directory",
+                     os.getcwd(),
+                     "system",
+                     metadata={"description": "Current working directory"})
     
-    def set(self, key: str, value: Any, source: str, 
-            metadata: Optional[Dict] = None) -> None:
+    def set(self, key: str, value: Any, source: str,
+            metadata: Optional[Dict] = None,
+            timestamp: Optional[float] = None) -> None:
         """
         Set a value in the context
-        
+
         Args:
             key: Key to store the value under
             value: Value to store
             source: Source of the value
             metadata: Additional information about the value
+            timestamp: Creation time; callers writing several entries in
+                one update can share a single clock reading
         """
+        old = self.entries.get(key)
+        if old is not None and old.source != source:
+            self._source_index[old.source].discard(key)
+
         self.entries[key] = ContextEntry(
             key=key,
             value=value,
             source=source,
+            timestamp=timestamp,
             metadata=metadata
         )
-    
+        self._source_index.setdefault(source, set()).add(key)
+        self.entries.move_to_end(key)
+        self._evict_if_needed()
+
+    def set_many(self, pairs, source: str,
+                 timestamp: Optional[float] = None) -> None:
+        """
+        Set several values from one source under a shared timestamp
+
+        Args:
+            pairs: Iterable of (key, value) tuples
+            source: Source of the values
+            timestamp: Shared creation time (defaults to one clock reading)
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        for key, value in pairs:
+            self.set(key, value, source, timestamp=timestamp)
+
+    def _next_seq(self) -> int:
+        """Get the next result sequence number"""
+        self._seq += 1
+        return self._seq
+
+    def _evict_if_needed(self) -> None:
+        """Evict the least recently used unpinned entries over the cap"""
+        while len(self.entries) > MAX_CONTEXT_ENTRIES:
+            for key in self.entries:
+                if key not in PINNED_KEYS and not key.startswith(PINNED_PREFIXES):
+                    self._source_index[self.entries[key].source].discard(key)
+                    del self.entries[key]
+                    break
+            else:
+                # Everything left is pinned; nothing more to evict
+                break
+
     def get(self, key: str, default: Any = None) -> Any:
         """
         Get a value from the context
@@ -127,9 +242,14 @@ class ReasoningContext:
         Returns:
             The value, or default if not found
         """
+        if key not in self.entries and key in PINNED_KEYS:
+            self.initialize_default_context()
+
         if key in self.entries:
             entry = self.entries[key]
             entry.access()
+            # Refresh recency so frequently read entries survive eviction
+            self.entries.move_to_end(key)
             return entry.value
         return default
     
@@ -143,6 +263,8 @@ class ReasoningContext:
         Returns:
             True if the key exists, False otherwise
         """
+        if key not in self.entries and key in PINNED_KEYS:
+            self.initialize_default_context()
         return key in self.entries
     
     def update(self, key: str, value: Any, source: Optional[str] = None) -> bool:
@@ -162,10 +284,12 @@ class ReasoningContext:
         
         entry = self.entries[key]
         entry.value = value
-        
-        if source is not None:
+
+        if source is not None and source != entry.source:
+            self._source_index[entry.source].discard(key)
+            self._source_index.setdefault(source, set()).add(key)
             entry.source = source
-            
+
         entry.timestamp = time.time()
         return True
     
@@ -180,31 +304,35 @@ class ReasoningContext:
             True if deleted, False if key not found
         """
         if key in self.entries:
+            self._source_index[self.entries[key].source].discard(key)
             del self.entries[key]
             return True
         return False
     
-    def get_all(self) -> Dict[str, Any]:
+    def get_all(self) -> Mapping:
         """
         Get all context values
-        
+
         Returns:
-            Dictionary of all key-value pairs
+            A read-only mapping over the live entries; no copy is made.
+            Callers that need a mutable snapshot can dict() it.
         """
-        return {key: entry.value for key, entry in self.entries.items()}
+        self.initialize_default_context()
+        return _ValueView(self.entries)
     
     def get_by_source(self, source: str) -> Dict[str, Any]:
         """
         Get all context values from a specific source
-        
+
         Args:
             source: Source to filter by
-            
+
         Returns:
             Dictionary of key-value pairs from the source
         """
-        return {key: entry.value for key, entry in self.entries.items() 
-                if entry.source == source}
+        # O(matching) via the reverse index instead of scanning every entry
+        return {key: self.entries[key].value
+                for key in self._source_index.get(source, ())}
     
     def to_dict(self) -> Dict:
         """Convert to dictionary representation"""
@@ -212,18 +340,85 @@ class ReasoningContext:
             "chain_id": self.chain_id,
             "entries": {key: entry.to_dict() for key, entry in self.entries.items()}
         }
-    
+
+    def to_json_safe(self) -> Dict:
+        """
+        Convert to a dictionary of JSON-serializable primitives
+
+        Command results and metadata can carry datetimes, Paths, etc.;
+        this normalizes them in one walk so the result can be handed to
+        json.dump directly.
+        """
+        return normalize_value(self.to_dict())
+
+    def to_json_bytes(self) -> bytes:
+        """
+        Serialize the context to JSON bytes, via orjson when installed
+        """
+        return fastjson.dumps_bytes(self.to_json_safe())
+
+    def dump(self, fp) -> None:
+        """
+        Write the context as JSON to a file object, entry by entry
+
+        Serializing via to_dict + json.dumps builds the whole context as
+        one giant string first; streaming each entry keeps peak memory at
+        roughly the size of the largest single entry instead.
+
+        Args:
+            fp: A writable text file object
+        """
+        fp.write('{"chain_id": ')
+        json.dump(self.chain_id, fp)
+        fp.write(', "entries": {')
+
+        first = True
+        for key, entry in self.entries.items():
+            if not first:
+                fp.write(', ')
+            json.dump(key, fp)
+            fp.write(': ')
+            json.dump(normalize_value(entry.to_dict()), fp)
+            first = False
+
+        fp.write('}}')
+
     @classmethod
     def from_dict(cls, data: Dict) -> 'ReasoningContext':
         """Create from dictionary representation"""
         context = cls(chain_id=data["chain_id"])
-        
-        # Replace default entries with the ones from data
-        context.entries = {}
-        
+
+        # Replace default entries with the ones from data. The entry map
+        # must stay an OrderedDict - get/set call move_to_end on it for
+        # the LRU ordering
+        context.entries = OrderedDict()
+
+        context._source_index = {}
         for key, entry_data in data.get("entries", {}).items():
-            context.entries[key] = ContextEntry.from_dict(entry_data)
-            
+            entry = ContextEntry.from_dict(entry_data)
+            context.entries[key] = entry
+            context._source_index.setdefault(entry.source, set()).add(key)
+
+        # Rebuild the index-aligned step-result list from the keyed
+        # entries (which are authoritative), tolerating gaps from chains
+        # serialized mid-wave
+        for key, entry in context.entries.items():
+            if key.startswith("step_result_"):
+                suffix = key.rsplit("_", 1)[1]
+                if suffix.isdigit():
+                    idx = int(suffix)
+                    while len(context.step_results) <= idx:
+                        context.step_results.append(None)
+                    context.step_results[idx] = entry.value
+
+        # Resume the result sequence where the serialized context left
+        # off, so new command/search results can't stomp restored keys
+        for key in context.entries:
+            if key.startswith(("command_result_", "search_result_")):
+                suffix = key.rsplit("_", 1)[1]
+                if suffix.isdigit():
+                    context._seq = max(context._seq, int(suffix))
+
         return context
     
     def update_from_command_result(self, result: Dict) -> None:
@@ -236,38 +431,36 @@ class ReasoningContext:
         command = result.get("command", "")
         output = result.get("output", "")
         success = result.get("success", False)
-        
+
+        # One clock reading shared by every entry written in this update
+        now = time.time()
+
         # Store command result
-        command_key = f"command_result_{int(time.time())}"
-        self.set(command_key, result, "command_execution", 
-                 metadata={"command": command, "success": success})
-        
+        command_key = f"command_result_{self._next_seq()}"
+        self.set(command_key, result, "command_execution",
+                 metadata={"command": command, "success": success}, timestamp=now)
+
         # Store the last command regardless
-        self.set("last_command", command, "command_execution")
-        self.set("last_command_output", output, "command_execution")
-        self.set("last_command_success", success, "command_execution")
-        
-        # Update command history
-        history = self.get("command_history", [])
+        self.set("last_command", command, "command_execution", timestamp=now)
+        self.set("last_command_output", output, "command_execution", timestamp=now)
+        self.set("last_command_success", success, "command_execution", timestamp=now)
+        
+        # Update command history in place; the bounded deque discards the
+        # oldest commands and avoids re-wrapping a growing list per call
+        history = self.get("command_history")
+        if history is None:
+            history = deque(maxlen=256)
+            self.set("command_history", history, "command_execution", timestamp=now)
         history.append(command)
-        self.set("command_history", history, "command_execution")
         
-        # Try to detect file operations
-        if "mkdir" in command:
-            # Extract directory from mkdir command
-            parts = command.split("mkdir")
-            if len(parts) > 1:
-                dir_part = parts[1].strip()
-                # Remove options
-                if dir_part.startswith("-"):
-                    dir_part = " ".join(dir_part.split()[1:])
-                
+        # Try to detect file operations with one compiled scan
+        for match in _FILE_OP_RE.finditer(command):
+            if match.group(1) == "mkdir":
                 # Store created directory
-                self.set("last_created_directory", dir_part, "command_execution")
-        
-        if "mv" in command or "cp" in command:
-            # Track file operations for later use
-            self.set("last_file_operation", command, "command_execution")
+                self.set("last_created_directory", match.group(3).strip(), "command_execution")
+            else:
+                # Track file operations for later use
+                self.set("last_file_operation", command, "command_execution")
     
     def update_from_search_result(self, result: Dict) -> None:
         """
@@ -278,55 +471,125 @@ class ReasoningContext:
         """
         if not result.get("success", False):
             return
-            
-        files = result.get("files", [])
-        
+
+        # Hoist the nested lookups once; empty values are skipped entirely
+        files = result.get("files") or []
+        summary = result.get("summary") or {}
+
+        # One clock reading shared by every entry written in this update
+        now = time.time()
+
         # Store search results
-        search_key = f"search_result_{int(time.time())}"
-        self.set(search_key, result, "file_search", 
-                 metadata={"file_count": len(files)})
-        
-        # Always update latest search results
-        self.set("last_search_files", files, "file_search")
-        self.set("last_search_count", len(files), "file_search")
-        
-        # Store summary information
-        if "summary" in result:
-            self.set("last_search_summary", result["summary"], "file_search")
-            
-            # Extract useful information
-            categories = result["summary"].get("categories", {})
+        search_key = f"search_result_{self._next_seq()}"
+        self.set(search_key, result, "file_search",
+                 metadata={"file_count": len(files)}, timestamp=now)
+
+        # Always update latest search results; summary-derived entries are
+        # only written when there is something to store
+        updates = [
+            ("last_search_files", files),
+            ("last_search_count", len(files)),
+        ]
+
+        if summary:
+            updates.append(("last_search_summary", summary))
+
+            categories = summary.get("categories")
             if categories:
-                self.set("file_categories", categories, "file_search")
-                
-            extensions = result["summary"].get("extensions", {})
+                updates.append(("file_categories", categories))
+
+            extensions = summary.get("extensions")
             if extensions:
-                self.set("file_extensions", extensions, "file_search")
+                updates.append(("file_extensions", extensions))
+
+        self.set_many(updates, "file_search", timestamp=now)
 
 
+# Contexts idle for longer than this are dropped on the next access;
+# every interaction creates a chain, so without a lifetime the manager
+# accumulates one context per turn for the life of the assistant
+CONTEXT_TTL_SECONDS = 1800
+
 class ContextManager:
     """
     Manages reasoning contexts for multiple reasoning chains
     """
-    
+
     def __init__(self):
         """Initialize the context manager"""
         self.contexts: Dict[str, ReasoningContext] = {}
-    
+        # Last-access times in access order, so the idle sweep only ever
+        # looks at the front
+        self._last_access: "OrderedDict[str, float]" = OrderedDict()
+        # Per-chain locks so concurrent tasks updating the same chain
+        # can't interleave entry writes; separate chains stay independent
+        self._locks: Dict[str, asyncio.Lock] = {}
+
     def get_context(self, chain_id: str) -> ReasoningContext:
         """
         Get or create a context for a reasoning chain
-        
+
         Args:
             chain_id: ID of the reasoning chain
-            
+
         Returns:
             The reasoning context
         """
+        now = time.time()
+        self._sweep_idle(now)
+
         if chain_id not in self.contexts:
             self.contexts[chain_id] = ReasoningContext(chain_id)
+
+        self._last_access[chain_id] = now
+        self._last_access.move_to_end(chain_id)
         return self.contexts[chain_id]
+
+    def lock_for(self, chain_id: str) -> asyncio.Lock:
+        """
+        Get the lock serializing updates to a chain's context
+
+        Args:
+            chain_id: ID of the reasoning chain
+
+        Returns:
+            The asyncio lock for that chain
+        """
+        if chain_id not in self._locks:
+            self._locks[chain_id] = asyncio.Lock()
+        return self._locks[chain_id]
+
+    def _sweep_idle(self, now: float) -> None:
+        """Drop contexts that have been idle past the TTL, oldest first"""
+        cutoff = now - CONTEXT_TTL_SECONDS
+        while self._last_access:
+            chain_id, last_access = next(iter(self._last_access.items()))
+            if last_access >= cutoff:
+                break
+            del self._last_access[chain_id]
+            self.contexts.pop(chain_id, None)
+            self._locks.pop(chain_id, None)
     
+    def dump(self, fp) -> None:
+        """
+        Write all managed contexts as one JSON object to a file object
+
+        Args:
+            fp: A writable text file object
+        """
+        fp.write('{')
+
+        first = True
+        for chain_id, context in self.contexts.items():
+            if not first:
+                fp.write(', ')
+            json.dump(chain_id, fp)
+            fp.write(': ')
+            context.dump(fp)
+            first = False
+
+        fp.write('}')
+
     def delete_context(self, chain_id: str) -> bool:
         """
         Delete a context
@@ -339,6 +602,8 @@ class ContextManager:
         """
         if chain_id in self.contexts:
             del self.contexts[chain_id]
+            self._last_access.pop(chain_id, None)
+            self._locks.pop(chain_id, None)
             return True
         return False
     
@@ -363,10 +628,17 @@ class ContextManager:
         
         # Store the raw step result as well
         step_id = step_info.get("step_id", 0)
-        context.set(f"step_result_{step_id}", step_result, "reasoning", 
+        context.set(f"step_result_{step_id}", step_result, "reasoning",
                   metadata={"step_id": step_id, "tool": tool_name})
+
+        # Keep the ordered list in sync for get_step_context. Steps in a
+        # wave complete in arbitrary order, so the result is placed at its
+        # step index rather than appended
+        while len(context.step_results) <= step_id:
+            context.step_results.append(None)
+        context.step_results[step_id] = step_result
     
-    def get_step_context(self, chain_id: str, step_id: int) -> Dict:
+    def get_step_context(self, chain_id: str, step_id: int) -> Mapping:
         """
         Get the relevant context for a specific step
         
@@ -378,17 +650,37 @@ class ContextManager:
             Context information relevant to the step
         """
         context = self.get_context(chain_id)
-        
-        # Get all entries
-        full_context = context.get_all()
-        
-        # Add previous step results specifically
-        for i in range(step_id):
-            result_key = f"step_result_{i}"
-            if context.has(result_key):
-                full_context[f"previous_step_{i}_result"] = context.get(result_key)
-        
-        return full_context
+
+        # Layer the prior step results (from the index-aligned list) over
+        # a lazy view of the entries - nothing is copied until a key is
+        # read. Slots for steps that haven't completed yet are None and
+        # skipped.
+        step_values = {
+            f"previous_step_{i}_result": result
+            for i, result in enumerate(context.step_results[:step_id])
+            if result is not None
+        }
+
+        return ChainMap(step_values, context.get_all())
+
+class NullContextManager(ContextManager):
+    """
+    Drop-in replacement used when multi-step reasoning is disabled.
+
+    Single-turn interactions never read reasoning context, so the branch
+    on MULTI_STEP_REASONING is resolved once at startup by swapping this
+    in: updates become no-ops and lookups return a shared empty mapping,
+    with no per-turn bookkeeping or allocations.
+    """
+
+    _EMPTY: Dict = {}
+
+    def update_context_from_step_result(self, chain_id: str, step_result: Dict, step_info: Dict) -> None:
+        pass
+
+    def get_step_context(self, chain_id: str, step_id: int) -> Mapping:
+        return self._EMPTY
+
 
 # Initialize global instance
 context_manager = ContextManager()
\ No newline at end of file
@@ -11,10 +11,12 @@ import pyaudio
 
 # Internal files
 from src.core.config import load_config
-from src.audio.audio_utils import record_audio
+from src.audio.audio_utils import record_audio, get_output_stream, close_output_stream
 from src.nlp.transcription import transcribe_audio
-from src.wake_word.wake_word import initialize_wake_word_detection, detect_wake_word
+from src.wake_word.wake_word import initialize_wake_word_detection, wait_for_wake_word
 from src.core.response_processor import process_and_play_response
+from src.nlp import openai_response
+from src.audio import text_to_speech
 
 
 # Simulate interaction
@@ -54,12 +56,48 @@ async def main():
     config['MULTI_STEP_REASONING'] = args.multi_step
     if args.multi_step:
         print("Multi-step reasoning enabled. Complex tasks will be processed in steps.")
+    else:
+        # Resolve the multi-step branch once at startup: without reasoning
+        # there is no context to track, so swap in the no-op manager
+        from src.core import context_manager as context_store
+        from src.core import response_processor
+        null_manager = context_store.NullContextManager()
+        context_store.context_manager = null_manager
+        response_processor.context_manager = null_manager
         
     # Add no-tts option to config
     config['NO_TTS'] = args.no_tts
     if args.no_tts:
         print("Text-to-speech output disabled.")
 
+    # Open the shared playback stream up front so the first response doesn't
+    # pay the device-open cost, and make sure it's released on exit
+    if not args.no_tts:
+        try:
+            get_output_stream()
+        except Exception as e:
+            print(f"Could not open audio output stream: {e}")
+
+    # Warm DNS/TLS to the LLM and TTS endpoints in the background while the
+    # user hasn't spoken yet, so the first turn skips the cold handshakes
+    warmup_task = asyncio.gather(
+        openai_response.warm_connection(),
+        text_to_speech.warm_connection(),
+        return_exceptions=True
+    )
+
+    try:
+        await run_assistant(args, config)
+    finally:
+        warmup_task.cancel()
+        close_output_stream()
+        await openai_response.close_client()
+
+
+async def run_assistant(args, config):
+    """
+    Run the assistant in the mode selected by the command-line arguments.
+    """
     if args.simulate:
         # Simulation mode: use predefined questions instead of audio input
         print("Running in simulation mode. No audio input required.")
@@ -98,21 +136,21 @@ async def main():
 
             try:
                 while True:
-                    # Continuously listen for the wake word
-                    if await detect_wake_word(porcupine, audio_stream):
-                        print("Wake word detected!")
-                        
-                        # Record audio after wake word detection
-                        audio_file, speech_end_time = record_audio(audio_stream, pa, config, cobra)
-                        
-                        # Transcribe the recorded audio
-                        transcription = transcribe_audio(audio_file, config)
-                        print(f"Transcription: {transcription}")
-                        
-                        # Process the transcription and play the response
-                        await process_and_play_response(transcription, speech_end_time, config)
-                        
-                        print("Waiting for wake word...")
+                    # Block until the wake word is heard
+                    await wait_for_wake_word(porcupine, audio_stream)
+                    print("Wake word detected!")
+
+                    # Record audio after wake word detection
+                    audio_file, speech_end_time = record_audio(audio_stream, pa, config, cobra)
+
+                    # Transcribe the recorded audio
+                    transcription = await transcribe_audio(audio_file, config)
+                    print(f"Transcription: {transcription}")
+
+                    # Process the transcription and play the response
+                    await process_and_play_response(transcription, speech_end_time, config)
+
+                    print("Waiting for wake word...")
 
             except KeyboardInterrupt:
                 print("Stopping...")
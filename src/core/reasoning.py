@@ -5,17 +5,26 @@ This module implements a multi-step reasoning system that allows Merlin to break
 complex tasks into logical steps, execute tools in sequence, and synthesize results.
 """
 
-import json
+import sys
+import uuid
 from typing import Dict, List, Any, Optional, Union
 
+from src.core._normalize import normalize_value
+from src.utils import fastjson
+
 class ReasoningStep:
     """Represents a single step in a reasoning chain"""
-    
-    def __init__(self, 
-                 step_id: int, 
-                 description: str, 
+
+    # Chains can hold many steps; slots drop the per-instance __dict__
+    __slots__ = ("step_id", "description", "tool_name", "tool_args",
+                 "depends_on", "result", "is_completed")
+
+    def __init__(self,
+                 step_id: int,
+                 description: str,
                  tool_name: Optional[str] = None,
-                 tool_args: Optional[Dict[str, Any]] = None):
+                 tool_args: Optional[Dict[str, Any]] = None,
+                 depends_on: Optional[List[int]] = None):
         """
         Initialize a reasoning step
         
@@ -24,11 +33,18 @@ class ReasoningStep:
             description: Description of what this step does
             tool_name: Name of the tool to execute (if any)
             tool_args: Arguments for the tool
+            depends_on: IDs of steps that must complete before this one.
+                None means "depends on the previous step" (the safe,
+                sequential default); an explicit empty list marks the step
+                as independent and eligible to run in parallel.
         """
         self.step_id = step_id
         self.description = description
-        self.tool_name = tool_name
+        # Tool names come from a small fixed vocabulary; intern them so
+        # repeated steps share one string object
+        self.tool_name = sys.intern(tool_name) if tool_name else tool_name
         self.tool_args = tool_args or {}
+        self.depends_on = depends_on
         self.result = None
         self.is_completed = False
         
@@ -39,6 +55,7 @@ class ReasoningStep:
             "description": self.description,
             "tool_name": self.tool_name,
             "tool_args": self.tool_args,
+            "depends_on": self.depends_on,
             "result": self.result,
             "is_completed": self.is_completed
         }
@@ -50,7 +67,8 @@ class ReasoningStep:
             step_id=data["step_id"],
             description=data["description"],
             tool_name=data.get("tool_name"),
-            tool_args=data.get("tool_args", {})
+            tool_args=data.get("tool_args", {}),
+            depends_on=data.get("depends_on")
         )
         step.result = data.get("result")
         step.is_completed = data.get("is_completed", False)
@@ -64,11 +82,15 @@ class ReasoningStep:
 
 class ReasoningChain:
     """Manages a chain of reasoning steps"""
-    
+
+    __slots__ = ("query", "steps", "current_step_idx", "is_completed",
+                 "final_response", "response_template", "_completed_dicts",
+                 "steps_text_parts")
+
     def __init__(self, query: str):
         """
         Initialize a reasoning chain
-        
+
         Args:
             query: The original user query that initiated this chain
         """
@@ -77,9 +99,19 @@ class ReasoningChain:
         self.current_step_idx = 0
         self.is_completed = False
         self.final_response = None
+        # Optional final-response template emitted by the planner in the
+        # same round-trip as the plan; filling it replaces a synthesis call
+        self.response_template = None
+        # Serialized views of completed steps, extended incrementally so
+        # get_context doesn't rebuild every dict on every call
+        self._completed_dicts: List[Dict] = []
+        # Display text per completed step, appended once at completion so
+        # synthesis prompts don't rebuild the whole transcript per step
+        self.steps_text_parts: List[str] = []
         
-    def add_step(self, description: str, tool_name: Optional[str] = None, 
-                 tool_args: Optional[Dict[str, Any]] = None) -> ReasoningStep:
+    def add_step(self, description: str, tool_name: Optional[str] = None,
+                 tool_args: Optional[Dict[str, Any]] = None,
+                 depends_on: Optional[List[int]] = None) -> ReasoningStep:
         """
         Add a new step to the chain
         
@@ -87,12 +119,13 @@ class ReasoningChain:
             description: Description of what this step does
             tool_name: Name of the tool to execute (if any)
             tool_args: Arguments for the tool
+            depends_on: IDs of steps this one depends on (None = previous)
             
         Returns:
             The created step
         """
         step_id = len(self.steps)
-        step = ReasoningStep(step_id, description, tool_name, tool_args)
+        step = ReasoningStep(step_id, description, tool_name, tool_args, depends_on)
         self.steps.append(step)
         return step
         
@@ -122,14 +155,16 @@ class ReasoningChain:
         Returns:
             A dictionary with the chain's context
         """
-        completed_steps = []
-        for step in self.steps[:self.current_step_idx]:
-            if step.is_completed:
-                completed_steps.append(step.to_dict())
-                
+        # Extend the cached views with any steps completed since the last
+        # call; steps complete in order, so this is amortized O(1)
+        for step in self.steps[len(self._completed_dicts):self.current_step_idx]:
+            if not step.is_completed:
+                break
+            self._completed_dicts.append(step.to_dict())
+
         return {
             "query": self.query,
-            "completed_steps": completed_steps,
+            "completed_steps": self._completed_dicts,
             "current_step_idx": self.current_step_idx,
             "is_completed": self.is_completed
         }
@@ -141,7 +176,8 @@ class ReasoningChain:
             "steps": [step.to_dict() for step in self.steps],
             "current_step_idx": self.current_step_idx,
             "is_completed": self.is_completed,
-            "final_response": self.final_response
+            "final_response": self.final_response,
+            "response_template": self.response_template
         }
         
     @classmethod
@@ -152,8 +188,48 @@ class ReasoningChain:
         chain.current_step_idx = data["current_step_idx"]
         chain.is_completed = data["is_completed"]
         chain.final_response = data.get("final_response")
+        chain.response_template = data.get("response_template")
         return chain
+
+    def to_json_bytes(self) -> bytes:
+        """
+        Serialize the chain to JSON bytes, via orjson when installed
+        """
+        return fastjson.dumps_bytes(normalize_value(self.to_dict()))
         
+    def append_step_text(self, step: ReasoningStep) -> None:
+        """Record a completed step's display text for synthesis prompts"""
+        self.steps_text_parts.append(
+            f"Step {step.step_id + 1}: {step.description}\nResult: {step.result}"
+        )
+
+    def fill_response_template(self) -> Optional[str]:
+        """
+        Fill the planner-provided response template with step outputs
+
+        Placeholders of the form {step_N_output} (1-based) are replaced
+        with the output of the corresponding step.
+
+        Returns:
+            The filled template, or None when no template was provided
+        """
+        if not self.response_template:
+            return None
+
+        text = self.response_template
+        for i, step in enumerate(self.steps, 1):
+            placeholder = f"{{step_{i}_output}}"
+            if placeholder in text:
+                if isinstance(step.result, dict):
+                    output = str(step.result.get("output", ""))
+                elif step.result is not None:
+                    output = str(step.result)
+                else:
+                    output = ""
+                text = text.replace(placeholder, output)
+
+        return text
+
     def complete(self, final_response: str) -> None:
         """
         Mark the chain as completed with a final response
@@ -182,7 +258,6 @@ class ReasoningEngine:
         Returns:
             Chain ID
         """
-        import uuid
         chain_id = f"chain_{uuid.uuid4().hex[:8]}"
         self.active_chains[chain_id] = ReasoningChain(query)
         return chain_id
@@ -274,13 +349,18 @@ class ReasoningEngine:
             return {"chain_id": chain_id, "context": self.get_chain(chain_id).get_context()}
             
         elif action == "plan":
+            # A template delivered with the plan replaces the final LLM
+            # synthesis round-trip
+            chain.response_template = data.get("response_template")
+
             # Add steps to the chain
             steps = data.get("steps", [])
             for step_data in steps:
                 chain.add_step(
                     description=step_data["description"],
                     tool_name=step_data.get("tool_name"),
-                    tool_args=step_data.get("tool_args")
+                    tool_args=step_data.get("tool_args"),
+                    depends_on=step_data.get("depends_on")
                 )
             return {"chain_id": chain_id, "context": chain.get_context()}
             
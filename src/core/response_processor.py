@@ -1,9 +1,15 @@
 import asyncio
+import hashlib
+import logging
+import re
+import shlex
 import time
-import json
 import os
+from collections import OrderedDict
+from difflib import SequenceMatcher
 from typing import Dict, List, Optional, Any, Tuple, Union
 
+from src.audio import text_to_speech
 from src.audio.text_to_speech import text_to_speech_stream
 from src.nlp.openai_response import run_conversation
 from src.audio.audio_utils import play_audio_stream
@@ -12,60 +18,371 @@ from src.core.context_manager import context_manager
 from src.nlp.file_search import file_search_manager
 from src.commands.command_executor import command_executor
 
+logger = logging.getLogger(__name__)
+
+# Fenced code blocks, stripped from spoken responses in one pass
+_CODE_FENCE_RE = re.compile(r"```.*?```", re.DOTALL)
+
+# Bounds for the TTS -> playback pipeline: the chunk queue is the ring
+# buffer between synthesis and the player (backpressure stops a fast TTS
+# service from buffering unbounded audio), and the sentence prefetch caps
+# how many sentences of synthesis run ahead of playback.
+TTS_CHUNK_QUEUE_MAX = 16
+TTS_PREFETCH_SENTENCES = 2
+
+# On-disk cache of synthesized audio, keyed on voice + sentence text.
+# Stock phrases ("He completado tu solicitud", greetings) repeat across
+# turns; a hit skips the TTS API round-trip entirely.
+TTS_CACHE_DIR = os.path.expanduser("~/.merlin/tts_cache")
+TTS_CACHE_MAX_FILES = 256
+
+def _tts_cache_path(sentence, config):
+    """Get the cache file path for a sentence under the configured voice"""
+    # The active service is part of the key so OpenAI and ElevenLabs audio
+    # for the same sentence can't collide under the default voice
+    service = "openai" if text_to_speech.USE_OPENAI else "elevenlabs"
+    voice = (config or {}).get('VOICE_ID') or "default"
+    key = hashlib.sha256(f"{service}:{voice}:{sentence}".encode()).hexdigest()
+    return os.path.join(TTS_CACHE_DIR, f"{key}.mp3")
+
+def _prune_tts_cache():
+    """Drop the oldest cached audio files beyond the cache bound"""
+    try:
+        entries = [(entry.stat().st_mtime, entry.path) for entry in os.scandir(TTS_CACHE_DIR)]
+    except OSError:
+        return
+    if len(entries) <= TTS_CACHE_MAX_FILES:
+        return
+    for _, path in sorted(entries)[:len(entries) - TTS_CACHE_MAX_FILES]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
 def process_response(response):
     """Process the response from the AI model
-    
+
     Args:
         response (str): The raw response from the AI model
-        
+
     Returns:
         str: The processed response
     """
-    # Remove any potential function calling artifacts
+    # Remove any potential function calling artifacts; one compiled sub
+    # replaces the split/filter/join dance and its intermediate lists
     if "```" in response:
-        # Extract code blocks and clean up
-        parts = response.split("```")
-        cleaned_parts = []
-        for i, part in enumerate(parts):
-            if i % 2 == 0:  # This is text outside code blocks
-                cleaned_parts.append(part)
-        response = "".join(cleaned_parts)
-    
+        response = _CODE_FENCE_RE.sub("", response)
+
+        # A dangling unmatched fence means everything after it was code
+        if "```" in response:
+            response = response.split("```", 1)[0]
+
     # Format the response for better readability
     response = response.strip()
-    
+
     return response
 
+def split_sentences(text):
+    """Split a response into sentences for pipelined TTS
+
+    Args:
+        text (str): The response text
+
+    Returns:
+        list: Non-empty sentences, split on terminators and newlines
+    """
+    sentences = re.split(r'(?<=[.!?])\s+|\n+', text)
+    return [s.strip() for s in sentences if s.strip()]
+
+async def _pump_tts(sentence, config, queue):
+    """Synthesize one sentence, pushing MP3 chunks into the queue as they arrive
+
+    Sentences already synthesized under the same voice are replayed from
+    the on-disk cache instead of calling the TTS API again.
+    """
+    cache_path = _tts_cache_path(sentence, config)
+    cancelled = False
+
+    try:
+        # Serve a cache hit straight from disk
+        try:
+            source = open(cache_path, 'rb')
+        except OSError:
+            source = None
+
+        if source is not None:
+            with source:
+                while True:
+                    chunk = source.read(4096)
+                    if not chunk:
+                        break
+                    await queue.put(chunk)
+            os.utime(cache_path)  # refresh for LRU pruning
+            return
+
+        stream = await text_to_speech_stream(sentence, config)
+        collected = []
+        if hasattr(stream, '__aiter__'):
+            async for chunk in stream:
+                collected.append(chunk)
+                await queue.put(chunk)
+        else:
+            for chunk in stream:
+                collected.append(chunk)
+                await queue.put(chunk)
+
+        # Persist only fully synthesized audio; rename keeps the write
+        # atomic so a crash can't leave a truncated cache entry
+        try:
+            os.makedirs(TTS_CACHE_DIR, exist_ok=True)
+            temp_path = cache_path + ".tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(b"".join(collected))
+            os.replace(temp_path, cache_path)
+            _prune_tts_cache()
+        except OSError:
+            pass
+    except asyncio.CancelledError:
+        cancelled = True
+        raise
+    finally:
+        if cancelled:
+            # The consumer is being torn down; the marker is best effort
+            try:
+                queue.put_nowait(None)
+            except asyncio.QueueFull:
+                pass
+        else:
+            # The end-of-stream marker must arrive even when the queue is
+            # still full of unplayed chunks (routine under playback
+            # backpressure, and guaranteed on cache hits, where nothing
+            # drains between the last put and this point) - dropping it
+            # leaves the player waiting on queue.get() forever
+            await queue.put(None)
+
+async def _queued_chunks(queue):
+    """Yield MP3 chunks from a queue until the end-of-stream marker"""
+    while True:
+        chunk = await queue.get()
+        if chunk is None:
+            break
+        yield chunk
+
+async def speak_response(text, config=None):
+    """Speak a response sentence by sentence, overlapping synthesis with playback
+
+    Each sentence's TTS chunks flow through a bounded queue straight into
+    the streaming player, so playback starts on the first chunk rather
+    than after the sentence finishes downloading - and while one sentence
+    plays, the next is already being synthesized. Time-to-first-sound
+    depends only on the first chunk of the first sentence.
+
+    Args:
+        text (str): The response text to speak
+        config (dict, optional): Configuration parameters
+
+    Returns:
+        None
+    """
+    sentences = split_sentences(text)
+    if not sentences:
+        return
+
+    def start(sentence):
+        queue = asyncio.Queue(maxsize=TTS_CHUNK_QUEUE_MAX)
+        return queue, asyncio.create_task(_pump_tts(sentence, config, queue))
+
+    current = start(sentences[0])
+    upcoming = None
+    try:
+        for i in range(len(sentences)):
+            if i + 1 < len(sentences):
+                upcoming = start(sentences[i + 1])
+
+            queue, task = current
+            await play_audio_stream(_queued_chunks(queue))
+            await task
+
+            current, upcoming = upcoming, None
+    finally:
+        # Don't orphan pump tasks if playback failed mid-response
+        for pair in (current, upcoming):
+            if pair is not None and not pair[1].done():
+                pair[1].cancel()
+
+# Sentence boundary for incremental splitting of streamed text
+_SENTENCE_BOUNDARY_RE = re.compile(r'(?<=[.!?])\s+|\n+')
+
+async def speak_response_stream(text_stream, config=None):
+    """Speak an LLM text stream sentence by sentence while it generates
+
+    Three overlapped stages: the collector pulls text deltas and emits
+    complete sentences, the synthesizer keeps up to two sentences of TTS
+    in flight, and the player streams each sentence's audio as it decodes.
+    First audio starts after the first sentence of the completion, not
+    after the full response.
+
+    Args:
+        text_stream: Async iterator yielding text pieces
+        config (dict, optional): Configuration parameters
+
+    Returns:
+        str: The full collected response text
+    """
+    sentence_q = asyncio.Queue()
+    pair_q = asyncio.Queue(maxsize=TTS_PREFETCH_SENTENCES)
+    collected = []
+
+    # The non-streamed path skips TTS entirely for responses over the
+    # budget; a stream's length isn't known up front, so speech stops at
+    # the budget instead while the text keeps collecting
+    tts_budget = (config or {}).get('TTS_MAX_CHARS', 500)
+
+    async def collect():
+        # Pull LLM deltas and emit complete sentences as they form
+        pending = ""
+        spoken = 0
+        try:
+            async for piece in text_stream:
+                collected.append(piece)
+                pending += piece
+                while True:
+                    boundary = _SENTENCE_BOUNDARY_RE.search(pending)
+                    if not boundary:
+                        break
+                    sentence = pending[:boundary.start()].strip()
+                    pending = pending[boundary.end():]
+                    if not sentence:
+                        continue
+                    if spoken >= tts_budget:
+                        if spoken == tts_budget:
+                            spoken += 1  # announce only once
+                            print(f"Respuesta demasiado larga (más de {tts_budget} caracteres), omitiendo el resto del TTS")
+                        continue
+                    spoken += len(sentence)
+                    await sentence_q.put(sentence)
+            tail = pending.strip()
+            if tail and spoken < tts_budget:
+                await sentence_q.put(tail)
+        finally:
+            await sentence_q.put(None)
+
+    async def synthesize():
+        # Start TTS per sentence; pair_q's bound keeps synthesis at most
+        # TTS_PREFETCH_SENTENCES ahead of playback
+        while True:
+            sentence = await sentence_q.get()
+            if sentence is None:
+                await pair_q.put(None)
+                break
+            queue = asyncio.Queue(maxsize=TTS_CHUNK_QUEUE_MAX)
+            task = asyncio.create_task(_pump_tts(sentence, config, queue))
+            try:
+                await pair_q.put((queue, task))
+            except asyncio.CancelledError:
+                # Cancelled while waiting for a slot: the pair never made
+                # it into the queue, so nobody else can clean this pump up
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                raise
+
+    async def play():
+        while True:
+            pair = await pair_q.get()
+            if pair is None:
+                break
+            queue, task = pair
+            try:
+                await play_audio_stream(_queued_chunks(queue))
+                await task
+            except BaseException:
+                # The pair in hand is no longer in pair_q, so the outer
+                # error path can't reach its pump - stop it here
+                if not task.done():
+                    task.cancel()
+                raise
+
+    tasks = [asyncio.ensure_future(coro()) for coro in (collect, synthesize, play)]
+    try:
+        await asyncio.gather(*tasks)
+    except Exception as e:
+        print(f"Error en reproducción de audio: {str(e)}")
+
+        # Cancel the synth/play stages but let the collector run to the
+        # end: its sentence queue is unbounded, so it can keep pulling the
+        # model stream and the full text still comes back
+        for task in tasks[1:]:
+            if not task.done():
+                task.cancel()
+
+        # Pump tasks already handed into pair_q have no consumer left;
+        # unless cancelled here they block forever on their full chunk
+        # queues, leaking tasks and holding TTS streams open
+        pump_tasks = []
+        while True:
+            try:
+                pair = pair_q.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            if pair is not None:
+                pump_tasks.append(pair[1])
+                if not pair[1].done():
+                    pair[1].cancel()
+
+        # Await the collector to completion and reap everything we
+        # cancelled so nothing logs "exception was never retrieved"
+        await asyncio.gather(*tasks, *pump_tasks, return_exceptions=True)
+
+    return "".join(collected)
+
+async def _execute_commands_step(step, step_context):
+    """Execute command(s)"""
+    return await command_executor.execute_step(step, step_context)
+
+async def _search_files_step(step, step_context):
+    """Execute file search
+
+    The search walks directories and reads index files synchronously, so
+    it runs in a worker thread - a big directory scan shouldn't stall
+    TTS/LLM tasks on the event loop.
+    """
+    return await asyncio.to_thread(file_search_manager.execute_search_step, step)
+
+async def _synthesize_step(step, step_context):
+    """A reasoning step that doesn't use a tool"""
+    return {
+        "success": True,
+        "output": "This step was a reasoning/synthesis step with no tool execution required.",
+        "type": "reasoning"
+    }
+
+# Tool-name -> handler dispatch; one dict lookup per step, and the single
+# place to hook tracing or new tools into
+_TOOL_DISPATCH = {
+    "execute_commands": _execute_commands_step,
+    "search_files": _search_files_step,
+    "synthesize": _synthesize_step,
+}
+
 async def execute_reasoning_step(chain_id: str, step: ReasoningStep) -> Dict:
     """
     Execute a step in the reasoning process
-    
+
     Args:
         chain_id: ID of the reasoning chain
         step: The step to execute
-        
+
     Returns:
         Result of the step execution
     """
     # Get the context for this step
     step_context = context_manager.get_step_context(chain_id, step.step_id)
-    
+
     # Execute the step based on its tool
-    result = {}
-    
-    if step.tool_name == "execute_commands":
-        # Execute command(s)
-        result = await command_executor.execute_step(step, step_context)
-    elif step.tool_name == "search_files":
-        # Execute file search
-        result = file_search_manager.execute_search_step(step)
-    elif step.tool_name == "synthesize" or not step.tool_name:
-        # This is a reasoning step that doesn't use a tool
-        result = {
-            "success": True,
-            "output": "This step was a reasoning/synthesis step with no tool execution required.",
-            "type": "reasoning"
-        }
+    handler = _TOOL_DISPATCH.get(step.tool_name or "synthesize")
+
+    if handler is not None:
+        result = await handler(step, step_context)
     else:
         # Unknown tool
         result = {
@@ -74,13 +391,15 @@ async def execute_reasoning_step(chain_id: str, step: ReasoningStep) -> Dict:
             "output": f"Could not execute step with unknown tool: {step.tool_name}"
         }
     
-    # Update the context with the result
-    context_manager.update_context_from_step_result(
-        chain_id, 
-        result, 
-        {"step_id": step.step_id, "tool_name": step.tool_name}
-    )
-    
+    # Update the context with the result, serialized per chain so steps
+    # running concurrently can't interleave entry writes
+    async with context_manager.lock_for(chain_id):
+        context_manager.update_context_from_step_result(
+            chain_id,
+            result,
+            {"step_id": step.step_id, "tool_name": step.tool_name}
+        )
+
     return result
 
 async def run_reasoning_chain(chain_id: str) -> str:
@@ -97,32 +416,28 @@ async def run_reasoning_chain(chain_id: str) -> str:
     if not chain:
         return "Error: Reasoning chain not found."
     
-    print(f"🔄 Iniciando cadena de razonamiento: {chain.query}")
-    print(f"🔄 Pasos planificados: {len(chain.steps)}")
-    
-    # Execute each step in order
-    current_step_idx = 0
-    while current_step_idx < len(chain.steps):
-        step = chain.steps[current_step_idx]
-        
-        print(f"🔄 Ejecutando paso {current_step_idx + 1}/{len(chain.steps)}: {step.description}")
-        
+    logger.info("Iniciando cadena de razonamiento: %s (%d pasos)", chain.query, len(chain.steps))
+
+    total_steps = len(chain.steps)
+
+    async def run_step(step):
+        logger.debug("Ejecutando paso %d/%d: %s", step.step_id + 1, total_steps, step.description)
+
         try:
             # Execute the step
             result = await execute_reasoning_step(chain_id, step)
-            
+
             # Print some debug info
             success = result.get("success", False)
-            status = "✅ Éxito" if success else "❌ Error"
-            print(f"{status} en paso {current_step_idx + 1}: {step.description}")
-            
+            logger.debug("%s en paso %d: %s", "Éxito" if success else "Error", step.step_id + 1, step.description)
+
             if not success and "error" in result:
-                print(f"Error: {result['error']}")
-            
+                logger.warning("Error en paso %d: %s", step.step_id + 1, result["error"])
+
             # Update the step with the result
             step.set_result(result)
         except Exception as e:
-            print(f"❌ Error ejecutando paso {current_step_idx + 1}: {str(e)}")
+            logger.warning("Error ejecutando paso %d: %s", step.step_id + 1, e)
             # Create error result
             error_result = {
                 "success": False,
@@ -130,53 +445,112 @@ async def run_reasoning_chain(chain_id: str) -> str:
                 "output": f"Error ejecutando paso: {str(e)}"
             }
             step.set_result(error_result)
-        
-        # Move to the next step
-        current_step_idx += 1
-        chain.current_step_idx = current_step_idx
-    
+
+    # Execute the steps in dependency waves: everything whose declared
+    # dependencies are satisfied runs concurrently. Steps without an
+    # explicit depends_on keep the safe sequential default (previous step).
+    done = set()
+    pending = list(chain.steps)
+
+    while pending:
+        ready = []
+        for step in pending:
+            if step.depends_on is not None:
+                deps = step.depends_on
+            elif step.step_id > 0:
+                deps = (step.step_id - 1,)
+            else:
+                deps = ()
+            if all(dep in done for dep in deps):
+                ready.append(step)
+
+        if not ready:
+            # Broken dependency declaration (cycle or unknown id); degrade
+            # to executing the remainder in plan order
+            ready = [pending[0]]
+
+        await asyncio.gather(*(run_step(step) for step in ready))
+
+        for step in ready:
+            done.add(step.step_id)
+            pending.remove(step)
+
+        chain.current_step_idx = len(done)
+
     # Chain is complete
     chain.is_completed = True
-    print(f"✅ Cadena de razonamiento completada")
+    logger.info("Cadena de razonamiento completada")
     
     # Generate final response
     if not chain.final_response:
-        # Get all step results
+        # Prefer the template delivered with the plan - it came in the
+        # same round-trip and just needs the step outputs filled in
+        templated = chain.fill_response_template()
+        if templated:
+            chain.final_response = templated
+            return templated
+
+        # One pass over the steps collects every aggregate the response
+        # composition below needs (text, successes, failures, the search
+        # and move steps), instead of five separate scans
         steps_text = []
+        all_success = True
+        failed_steps = []
+        first_error = None
+        search_step = None
+        move_step = None
+
         for i, step in enumerate(chain.steps):
-            if step.is_completed and step.result:
-                output = step.result.get("output", "No output")
-                # Truncate long outputs for clarity
-                if len(output) > 200:
-                    output = output[:200] + "..."
-                steps_text.append(f"Paso {i+1}: {step.description}\nResultado: {output}")
-        
+            if not (step.is_completed and step.result):
+                continue
+
+            output = step.result.get("output", "No output")
+            # Truncate long outputs for clarity
+            if len(output) > 200:
+                output = output[:200] + "..."
+            steps_text.append(f"Paso {i+1}: {step.description}\nResultado: {output}")
+
+            if not step.result.get("success", False):
+                all_success = False
+                failed_steps.append(i + 1)
+                if first_error is None:
+                    first_error = step.result.get("error", "Error desconocido")
+
+            if search_step is None and step.tool_name == "search_files":
+                search_step = step
+            if move_step is None and ("mover" in step.description.lower()
+                    or any("mv" in cmd for cmd in step.tool_args.get("commands", []))):
+                move_step = step
+
         # Create a response using the results
         final_response = f"He completado tu solicitud: '{chain.query}'\n\n"
-        
-        # Check if all steps were successful
-        all_success = all(step.result.get("success", False) for step in chain.steps if step.is_completed)
-        
+
         if all_success:
             # Create a concise successful response
             if "buscar" in chain.query.lower() and "mover" in chain.query.lower():
                 # For file operations, create a summary of what was done
-                search_step = next((s for s in chain.steps if s.tool_name == "search_files"), None)
-                move_step = next((s for s in chain.steps if "mover" in s.description.lower() or "mv" in str(s.tool_args)), None)
-                
                 if search_step and search_step.result:
                     files = search_step.result.get("files", [])
                     file_count = len(files)
                     if file_count > 0:
                         target_dir = None
                         if move_step and move_step.tool_args:
-                            # Try to extract target directory from commands
-                            if "commands" in move_step.tool_args:
-                                for cmd in move_step.tool_args["commands"]:
-                                    if "mkdir" in cmd:
-                                        target_dir = cmd.split("mkdir")[1].strip().split()[-1].strip('"\'')
-                                    elif "mv" in cmd and "-t" in cmd:
-                                        target_dir = cmd.split("-t")[1].strip().split()[0].strip('"\'')
+                            # Try to extract target directory from commands;
+                            # one shlex tokenize per command handles quoted
+                            # paths correctly instead of chained str.splits
+                            for cmd in move_step.tool_args.get("commands", []):
+                                try:
+                                    tokens = shlex.split(cmd)
+                                except ValueError:
+                                    continue
+                                if not tokens:
+                                    continue
+                                if tokens[0] == "mkdir":
+                                    target_dir = tokens[-1]
+                                elif tokens[0] == "mv" and "-t" in tokens:
+                                    t_idx = tokens.index("-t")
+                                    if t_idx + 1 < len(tokens):
+                                        target_dir = tokens[t_idx + 1]
                         
                         if target_dir:
                             final_response = f"He organizado {file_count} archivos en la carpeta {target_dir}.\n\n"
@@ -196,52 +570,98 @@ async def run_reasoning_chain(chain_id: str) -> str:
                 final_response = f"He completado tu solicitud: '{chain.query}'"
         else:
             # Some steps failed
-            failed_steps = [i+1 for i, step in enumerate(chain.steps) 
-                          if step.is_completed and not step.result.get("success", False)]
-            
-            if failed_steps:
-                final_response = f"No pude completar tu solicitud. Hubo problemas en los pasos {', '.join(map(str, failed_steps))}.\n\n"
-                
-                # Get the first error
-                for step in chain.steps:
-                    if step.is_completed and not step.result.get("success", False):
-                        error = step.result.get("error", "Error desconocido")
-                        final_response += f"Error: {error}"
-                        break
+            final_response = f"No pude completar tu solicitud. Hubo problemas en los pasos {', '.join(map(str, failed_steps))}.\n\n"
+            final_response += f"Error: {first_error}"
         
         # Set as the chain's final response
         chain.final_response = final_response
     
     return chain.final_response
 
-async def process_and_play_response(transcription, speech_end_time, config=None):
-    """Process the transcription, get AI response, and play audio
-    
+# Routing vocabulary for the multi-step heuristic, fused into compiled
+# word-boundary alternations: one C-level scan over the transcription
+# replaces per-indicator Python loops. Phrases come first so the longest
+# alternative wins.
+_COMPLEX_PHRASES = ("create folder", "how many", "do i have")
+_COMPLEX_WORDS = (
+    "search", "find", "organize", "move", "copy", "sort", "rename",
+    "delete", "remove", "list", "categorize", "what", "which", "where",
+)
+_COMPLEXITY_RE = re.compile(
+    r"\b(" + "|".join(map(re.escape, _COMPLEX_PHRASES + _COMPLEX_WORDS)) + r")\b"
+)
+_FILE_TYPE_RE = re.compile(
+    r"\b(files|documents|music|photos|images|pdf|mp3|videos)\b"
+)
+
+# Bounded cache of recent responses, used when CACHE_RESPONSES is enabled
+_response_cache: "OrderedDict[Tuple[str, bool], str]" = OrderedDict()
+RESPONSE_CACHE_MAX = 128
+
+def _normalize_cache_key(transcription):
+    """Normalize a transcription for cache lookups"""
+    return " ".join(transcription.lower().split())
+
+def _find_similar_cached(key):
+    """Find the best near-match for a cache key among cached transcriptions
+
+    The similarity tier catches paraphrases and transcription jitter
+    ("what's the time" vs "whats the time"). The request proposed an
+    embedding index for this; neither sentence-transformers nor FAISS is a
+    dependency here, so a difflib ratio over the bounded cache stands in -
+    at 128 entries the scan is cheap, and real_quick_ratio prunes most
+    candidates before the quadratic comparison runs.
+
+    Args:
+        key: (normalized transcription, multi-step flag) tuple
+
+    Returns:
+        The matching cache key and similarity ratio, or (None, 0.0)
+    """
+    best_key = None
+    best_ratio = 0.0
+    matcher = SequenceMatcher(None, key[0])
+
+    for cached_key in _response_cache:
+        if cached_key[1] != key[1]:
+            continue
+        matcher.set_seq2(cached_key[0])
+        # Two cheap upper bounds prune candidates before the quadratic
+        # comparison: length-based first, then character-multiset
+        if matcher.real_quick_ratio() <= best_ratio:
+            continue
+        if matcher.quick_ratio() <= best_ratio:
+            continue
+        ratio = matcher.ratio()
+        if ratio > best_ratio:
+            best_key = cached_key
+            best_ratio = ratio
+
+    return best_key, best_ratio
+
+async def generate_response(transcription, use_multi_step):
+    """Generate the AI response for a transcription
+
     Args:
         transcription (str): User's transcribed speech or text input
-        speech_end_time (float): Time when the speech ended
-        config (dict, optional): Configuration parameters
-        
+        use_multi_step (bool): Whether multi-step reasoning is enabled
+
     Returns:
-        None
+        str: The raw response from the AI model
     """
-    # Mark the start time for processing
-    start_time = time.time()
-    
-    print("Processing your request...")
-    
-    # Get AI response with or without multi-step reasoning
-    use_multi_step = config.get('MULTI_STEP_REASONING', False) if config else False
     response = None
-    
+
+    # Lowercase once; every routing check below reads this
+    t_lower = transcription.lower()
+
     # Special command handlers
-    if transcription.lower().startswith("create") or transcription.lower().startswith("make"):
+    if t_lower.startswith(("create", "make")):
         # Handle directory/file creation separately
         # Extract the directory/file to create
-        words = transcription.lower().split()
+        words = t_lower.split()
         if "directory" in words or "folder" in words:
             # This is a directory creation request
-            print("Detected directory creation request")
+            logger.debug("Detected directory creation request")
             # Try the direct approach with conversation API
             response = await run_conversation(transcription)
         else:
@@ -249,29 +669,21 @@ async def process_and_play_response(transcription, speech_end_time, config=None)
             response = await run_conversation(transcription)
             
     elif use_multi_step:
-        # Force enable multi-step reasoning for file operations and search commands
-        is_complex = False
-        
-        # Look for specific operation phrases and question words that might need multi-step processing
-        file_op_indicators = ["search", "find", "organize", "move", "copy", "create folder", 
-                           "sort", "rename", "delete", "remove", "list", "categorize", 
-                           "what", "which", "where", "how many", "do i have"]
-        
-        for indicator in file_op_indicators:
-            if indicator in transcription.lower():
-                is_complex = True
-                print(f"Detected complex operation: {indicator}")
-                break
-        
+        # Force enable multi-step reasoning for file operations and search
+        # commands: one compiled scan over the transcription covers words
+        # and phrases alike
+        match = _COMPLEXITY_RE.search(t_lower)
+        is_complex = match is not None
+        if is_complex:
+            logger.debug("Detected complex operation: %s", match.group(1))
+
         # Check for specific file types and content
-        file_types = ["files", "documents", "music", "photos", "images", "pdf", "mp3", "videos"]
-        has_file_type = any(ft in transcription.lower() for ft in file_types)
-        if has_file_type:
-            print("Detected reference to file types")
+        if _FILE_TYPE_RE.search(t_lower):
+            logger.debug("Detected reference to file types")
             is_complex = True
         
         if is_complex:
-            print("Using multi-step reasoning for complex task")
+            logger.debug("Using multi-step reasoning for complex task")
             
             try:
                 # Get or create a reasoning chain
@@ -279,47 +691,116 @@ async def process_and_play_response(transcription, speech_end_time, config=None)
                 
                 # Run the conversation to generate the reasoning plan
                 planning_response = await run_conversation(transcription)
-                print(f"Planning response: {planning_response[:100]}...")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Planning response: %s...", planning_response[:100])
                 
                 # Check if planning was successful
                 chain = reasoning_engine.get_chain(chain_id)
                 if chain and chain.steps:
-                    print(f"Chain has {len(chain.steps)} steps. Running reasoning chain...")
+                    logger.debug("Chain has %d steps. Running reasoning chain...", len(chain.steps))
                     # Run the reasoning chain
                     response = await run_reasoning_chain(chain_id)
-                    print(f"Reasoning chain completed successfully: {len(chain.steps)} steps")
+                    logger.debug("Reasoning chain completed successfully: %d steps", len(chain.steps))
                 else:
-                    # Fall back to regular conversation
-                    print("No reasoning steps were generated, falling back to normal conversation")
-                    response = await run_conversation(transcription)
+                    # The planning call already produced a normal
+                    # conversational answer; reuse it instead of paying a
+                    # second LLM round-trip for the fallback
+                    logger.debug("No reasoning steps were generated, using the planning response")
+                    response = planning_response
             except Exception as e:
-                print(f"Error in multi-step reasoning: {str(e)}")
+                logger.warning("Error in multi-step reasoning: %s", e)
                 # Fall back to regular conversation
                 response = await run_conversation(transcription)
         else:
             # Use regular conversation for simple queries
             response = await run_conversation(transcription)
     else:
-        # Use regular conversation mode
-        response = await run_conversation(transcription)
+        # Use regular conversation mode, streaming text deltas so speech
+        # can start while the model is still generating
+        response = await run_conversation(transcription, stream=True)
     
-    # Process the response
-    processed_response = process_response(response)
-    print(f"AI Response: {processed_response}")
+    return response
+
+async def process_and_play_response(transcription, speech_end_time, config=None):
+    """Process the transcription, get AI response, and play audio
     
-    # Skip TTS for very long responses or if disabled in config
-    use_tts = not config.get('NO_TTS', False) if config else True
-    response_too_long = len(processed_response) > 500
+    Args:
+        transcription (str): User's transcribed speech or text input
+        speech_end_time (float): Time when the speech ended
+        config (dict, optional): Configuration parameters
+        
+    Returns:
+        None
+    """
+    # Mark the start time for processing
+    start_time = time.time()
     
-    if use_tts and not response_too_long:
-        try:
-            # Convert text to speech and play audio
-            audio_stream = await text_to_speech_stream(processed_response, config)
-            await play_audio_stream(audio_stream)
-        except Exception as e:
-            print(f"Error en reproducción de audio: {str(e)}")
-    elif response_too_long:
-        print(f"Respuesta demasiado larga ({len(processed_response)} caracteres), omitiendo TTS")
+    print("Processing your request...")
+    
+    # Resolve the config flags once instead of re-testing config per use
+    cfg = config or {}
+    use_multi_step = cfg.get('MULTI_STEP_REASONING', False)
+
+    # Serve repeat requests from the bounded response cache when enabled:
+    # exact (normalized) match first, then a similarity match above
+    # CACHE_THRESHOLD. Opt-in via CACHE_RESPONSES because a cached turn
+    # replays the text without re-running any commands behind it.
+    cache_enabled = bool(cfg.get('CACHE_RESPONSES'))
+    cache_key = (_normalize_cache_key(transcription), use_multi_step)
+
+    cache_hit = None
+    if cache_enabled:
+        if cache_key in _response_cache:
+            cache_hit = cache_key
+        else:
+            similar_key, ratio = _find_similar_cached(cache_key)
+            if similar_key is not None and ratio >= cfg.get('CACHE_THRESHOLD', 0.9):
+                cache_hit = similar_key
+
+    if cache_hit is not None:
+        _response_cache.move_to_end(cache_hit)
+        response = _response_cache[cache_hit]
+        print("Serving cached response")
+    else:
+        response = await generate_response(transcription, use_multi_step)
+
+    use_tts = not cfg.get('NO_TTS', False)
+
+    if hasattr(response, '__aiter__'):
+        # Streamed response: sentences are spoken while the model is still
+        # generating; the collected text comes back for logging and cache
+        if use_tts:
+            response = await speak_response_stream(response, config)
+        else:
+            response = "".join([piece async for piece in response])
+
+        processed_response = process_response(response)
+        asyncio.get_event_loop().run_in_executor(None, print, f"AI Response: {processed_response}")
+    else:
+        # Process the response
+        processed_response = process_response(response)
+
+        # Log the response off the hot path - a slow stdout (SSH, piped
+        # terminal) shouldn't delay the start of TTS
+        asyncio.get_event_loop().run_in_executor(None, print, f"AI Response: {processed_response}")
+
+        # Skip TTS for very long responses or if disabled in config; the
+        # length is computed once and the char budget is configurable
+        response_len = len(processed_response)
+
+        if response_len > cfg.get('TTS_MAX_CHARS', 500):
+            print(f"Respuesta demasiado larga ({response_len} caracteres), omitiendo TTS")
+        elif use_tts:
+            try:
+                # Convert text to speech and play audio, sentence by sentence
+                await speak_response(processed_response, config)
+            except Exception as e:
+                print(f"Error en reproducción de audio: {str(e)}")
+
+    if cache_enabled and cache_hit is None and response:
+        _response_cache[cache_key] = response
+        while len(_response_cache) > RESPONSE_CACHE_MAX:
+            _response_cache.popitem(last=False)
     
     # Calculate total processing time
     total_time = time.time() - start_time
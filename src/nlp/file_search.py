@@ -6,8 +6,9 @@ It manages vector stores, file uploads, and search operations, and provides spec
 functions for integration with the multi-step reasoning system.
 """
 
+import copy
 import os
-import json
+from contextlib import contextmanager
 import tempfile
 import requests
 import datetime
@@ -16,9 +17,43 @@ from io import BytesIO
 from typing import Dict, List, Optional, Any, Union, Tuple
 
 from openai import OpenAI
+from src.utils import fastjson
 from src.utils.directory_indexer import directory_indexer
 from src.core.reasoning import ReasoningStep
 
+# File entries in rendered search results; compiled once (ASCII mode -
+# the matched digits/punctuation never need Unicode property checks)
+_FILE_ENTRY_RE = re.compile(
+    r'(\d+)\.\s+([^\n]+)\s+\(([^\)]+)\)\s+Located\s+at:\s+([^\n]+)\s+Size:\s+(\d+)\s+bytes,\s+Modified:\s+([^\n]+)',
+    re.ASCII
+)
+
+class _SearchResponse:
+    """
+    Lightweight stand-in for the OpenAI search response object.
+
+    Defined once at module scope (the class was previously rebuilt inside
+    every search call) and slotted so instances stay small.
+    """
+
+    __slots__ = ("text", "output", "structured")
+
+    def __init__(self, text):
+        self.text = text
+        self.structured = None
+        # Create a structure similar to what OpenAI API would return
+        self.output = [
+            {
+                "type": "message",
+                "content": [
+                    {
+                        "text": text
+                    }
+                ]
+            }
+        ]
+
+
 class FileSearchManager:
     """
     Manages integration with OpenAI's file search capabilities.
@@ -27,6 +62,10 @@ class FileSearchManager:
     multi-step reasoning system.
     """
     
+    # Parsed-config cache shared across instances, keyed on the file's
+    # stat signature so an unchanged config never gets re-read or re-parsed
+    _config_cache: Dict[str, Tuple[Tuple[int, int], Dict]] = {}
+
     def __init__(self, api_key: Optional[str] = None):
         """
         Initialize the file search manager
@@ -35,11 +74,57 @@ class FileSearchManager:
             api_key: OpenAI API key (if None, will use environment variable)
         """
         self.api_key = api_key
-        self.client = OpenAI(api_key=self.api_key)
+        # Client construction is deferred to first use so importing this
+        # module (e.g. for the offline CLI) doesn't require an API key
+        self._client = None
         self.vector_stores = {}
+        # Reverse indexes so id-based lookups and the all-directories
+        # listing don't scan every store per call
+        self._id_to_name: Dict[str, str] = {}
+        self._all_indexed_dirs: set = set()
+        self._store_dir_sets: Dict[str, set] = {}
+        # Bumped whenever the indexed-directory listing changes, so prompt
+        # caches keyed on it can tell when to rebuild
+        self.version = 0
         self.config_path = os.path.expanduser("~/.merlin/file_search_config.json")
+        # Batched-save state: inside a batch, save_config only marks the
+        # config dirty and one write happens at the end
+        self._in_batch = False
+        self._dirty = False
+        # Per-directory trigram indexes over filenames, keyed on the
+        # index's last_indexed stamp so a re-index invalidates them
+        self._trigram_cache: Dict[str, Tuple[Any, Dict[str, set]]] = {}
         self.ensure_config_directory()
         self.load_config()
+
+    @property
+    def client(self):
+        """The OpenAI client, created on first use"""
+        if self._client is None:
+            self._client = OpenAI(api_key=self.api_key)
+        return self._client
+
+    @contextmanager
+    def _batch_saves(self):
+        """
+        Coalesce save_config calls within the block into one final write.
+
+        index_directory otherwise serializes the full config three times
+        (store creation, file add, directory append) per indexed directory.
+        """
+        if self._in_batch:
+            # Already batching (nested call): no extra flush
+            yield
+            return
+
+        self._in_batch = True
+        try:
+            yield
+        finally:
+            self._in_batch = False
+            if self._dirty:
+                self._dirty = False
+                self.save_config()
     
     def ensure_config_directory(self):
         """Ensure the directory for config file exists"""
@@ -53,19 +138,53 @@ class FileSearchManager:
         Returns:
             True if successful, False otherwise
         """
-        if not os.path.exists(self.config_path):
+        try:
+            st = os.stat(self.config_path)
+        except OSError:
             return False
-            
+
+        stat_key = (st.st_mtime_ns, st.st_size)
+        cached = self._config_cache.get(self.config_path)
+        if cached is not None and cached[0] == stat_key:
+            # Unchanged on disk: reuse the parsed form
+            self.vector_stores = copy.deepcopy(cached[1])
+            self._rebuild_id_index()
+            return True
+
         try:
-            with open(self.config_path, 'r') as f:
-                config = json.load(f)
-                
+            with open(self.config_path, 'rb') as f:
+                config = fastjson.loads(f.read())
+
             self.vector_stores = config.get("vector_stores", {})
+            self._rebuild_id_index()
+            FileSearchManager._config_cache[self.config_path] = (
+                stat_key, copy.deepcopy(self.vector_stores)
+            )
             return True
         except Exception as e:
             print(f"Error loading file search config: {e}")
             return False
     
+    def _rebuild_id_index(self) -> None:
+        """Rebuild the reverse indexes derived from vector_stores"""
+        self._id_to_name = {
+            store_info["id"]: name
+            for name, store_info in self.vector_stores.items()
+            if "id" in store_info
+        }
+        self._all_indexed_dirs = {
+            directory
+            for store_info in self.vector_stores.values()
+            for directory in store_info.get("directories", [])
+        }
+        # Per-store sets kept beside the serializable lists so membership
+        # tests don't scan the list on every index operation
+        self._store_dir_sets = {
+            name: set(store_info.get("directories", []))
+            for name, store_info in self.vector_stores.items()
+        }
+        self.version += 1
+
     def save_config(self) -> bool:
         """
         Save vector store configuration to file
@@ -73,13 +192,27 @@ class FileSearchManager:
         Returns:
             True if successful, False otherwise
         """
+        if self._in_batch:
+            self._dirty = True
+            return True
+
         try:
             config = {
                 "vector_stores": self.vector_stores
             }
-            
-            with open(self.config_path, 'w') as f:
-                json.dump(config, f, indent=2)
+
+            # Write-then-rename keeps the config atomic; a crash mid-write
+            # can't leave a truncated file behind
+            temp_path = self.config_path + ".tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(fastjson.dumps_bytes_indented(config))
+            os.replace(temp_path, self.config_path)
+
+            # Keep the parsed cache in step with what we just wrote
+            st = os.stat(self.config_path)
+            FileSearchManager._config_cache[self.config_path] = (
+                (st.st_mtime_ns, st.st_size), copy.deepcopy(self.vector_stores)
+            )
             return True
         except Exception as e:
             print(f"Error saving file search config: {e}")
@@ -112,7 +245,9 @@ class FileSearchManager:
                 "file_counts": 0,
                 "directories": []
             }
-            
+            self._id_to_name[vector_store_id] = name
+            self._store_dir_sets[name] = set()
+
             self.save_config()
             
             print(f"Created test vector store: {name} (ID: {vector_store_id})")
@@ -160,8 +295,14 @@ class FileSearchManager:
         """
         try:
             # For testing purposes, we'll create a mock file ID
-            # In a production environment, this would actually upload the file to OpenAI
-            
+            # In a production environment, this would actually upload the file to OpenAI.
+            # Note for that implementation: indexing already coalesces each
+            # directory into one JSONL before calling this, so there is one
+            # upload per directory, not per file. If per-file uploads are
+            # ever needed, route them through the OpenAI Batch API
+            # (client.batches.create over a request JSONL) instead of
+            # issuing one HTTP round-trip per file.
+
             # Generate a unique ID for this file
             import uuid
             file_id = f"file_{uuid.uuid4().hex[:16]}"
@@ -191,12 +332,13 @@ class FileSearchManager:
         try:
             # For testing, we'll simulate adding a file to the vector store
             # In a production environment, this would use the OpenAI vector_stores.files.create API
-            
-            # Update vector store info
-            for name, store_info in self.vector_stores.items():
-                if store_info["id"] == vector_store_id:
-                    store_info["file_counts"] = store_info.get("file_counts", 0) + 1
-            
+
+            # Update vector store info via the reverse index
+            name = self._id_to_name.get(vector_store_id)
+            if name is not None:
+                store_info = self.vector_stores[name]
+                store_info["file_counts"] = store_info.get("file_counts", 0) + 1
+
             self.save_config()
             
             print(f"Added file {file_id} to vector store {vector_store_id}")
@@ -223,18 +365,21 @@ class FileSearchManager:
             # For testing, we'll simulate checking file status
             # In a production environment, this would use the OpenAI vector_stores.files.list API
             
-            # Find the vector store
+            # Find the vector store via the reverse index
             files_status = []
-            for name, store_info in self.vector_stores.items():
-                if store_info["id"] == vector_store_id:
-                    # Simulate file status
-                    for i in range(store_info.get("file_counts", 0)):
-                        files_status.append({
-                            "file_id": f"file_{i}",
-                            "object": "vector_store.file",
-                            "created_at": datetime.datetime.now().isoformat(),
-                            "status": "completed"
-                        })
+            name = self._id_to_name.get(vector_store_id)
+            if name is not None:
+                store_info = self.vector_stores[name]
+                # Simulate file status; one timestamp covers the batch
+                # instead of a datetime build+format per entry
+                now_iso = datetime.datetime.now().isoformat()
+                for i in range(store_info.get("file_counts", 0)):
+                    files_status.append({
+                        "file_id": f"file_{i}",
+                        "object": "vector_store.file",
+                        "created_at": now_iso,
+                        "status": "completed"
+                    })
             
             print(f"Checked status of {len(files_status)} files in vector store {vector_store_id}")
             
@@ -257,6 +402,14 @@ class FileSearchManager:
         Returns:
             Result information
         """
+        try:
+            with self._batch_saves():
+                return self._index_directory(directory_path, vector_store_name)
+        except Exception as e:
+            return {"error": f"Failed to index directory: {str(e)}"}
+
+    def _index_directory(self, directory_path: str, vector_store_name: str) -> Dict:
+        """Index a directory within one batched config save"""
         try:
             # Index the directory
             index_result = directory_indexer.index_directory(directory_path)
@@ -274,21 +427,22 @@ class FileSearchManager:
                     return create_result
                 vector_store_id = create_result["vector_store_id"]
             
-            # Generate JSONL file for OpenAI
-            temp_dir = tempfile.mkdtemp()
-            jsonl_path = os.path.join(temp_dir, "directory_index.jsonl")
-            
-            jsonl_result = directory_indexer.generate_jsonl_for_directory(
-                directory_path,
-                jsonl_path
-            )
-            
-            if "error" in jsonl_result:
-                return jsonl_result
-            
-            # Upload JSONL file to OpenAI
-            file_result = self.create_file(jsonl_path)
-            
+            # Generate JSONL file for OpenAI. The context manager cleans
+            # the temp dir up on every path, including errors
+            with tempfile.TemporaryDirectory() as temp_dir:
+                jsonl_path = os.path.join(temp_dir, "directory_index.jsonl")
+
+                jsonl_result = directory_indexer.generate_jsonl_for_directory(
+                    directory_path,
+                    jsonl_path
+                )
+
+                if "error" in jsonl_result:
+                    return jsonl_result
+
+                # Upload JSONL file to OpenAI
+                file_result = self.create_file(jsonl_path)
+
             if "error" in file_result:
                 return file_result
             
@@ -300,23 +454,23 @@ class FileSearchManager:
             if "error" in add_result:
                 return add_result
             
-            # Update vector store info
-            for name, store_info in self.vector_stores.items():
-                if name == vector_store_name:
-                    if directory_path not in store_info.get("directories", []):
-                        if "directories" not in store_info:
-                            store_info["directories"] = []
-                        store_info["directories"].append(directory_path)
+            # Update vector store info; the parallel set makes the
+            # membership test O(1) instead of a list scan
+            store_info = self.vector_stores.get(vector_store_name)
+            if store_info is not None:
+                dir_set = self._store_dir_sets.setdefault(
+                    vector_store_name, set(store_info.get("directories", []))
+                )
+                if directory_path not in dir_set:
+                    if "directories" not in store_info:
+                        store_info["directories"] = []
+                    store_info["directories"].append(directory_path)
+                    dir_set.add(directory_path)
+                    self.version += 1
+                self._all_indexed_dirs.add(directory_path)
             
             self.save_config()
             
-            # Clean up temp file
-            try:
-                os.remove(jsonl_path)
-                os.rmdir(temp_dir)
-            except:
-                pass
-            
             return {
                 "success": True,
                 "directory": directory_path,
@@ -329,7 +483,68 @@ class FileSearchManager:
         except Exception as e:
             return {"error": f"Failed to index directory: {str(e)}"}
     
-    def search(self, query: str, vector_store_name: str = "default", max_results: int = 5) -> Dict:
+    @staticmethod
+    def _result_entry(file: Dict) -> Dict:
+        """
+        Build the lean result payload for a matched index entry.
+
+        Only the hot fields consumers actually read (name, path, category,
+        size, modified) travel onward; the index entry's cold fields
+        (relative paths, precomputed lowercase forms, timestamps) stay
+        behind in the index.
+        """
+        return {
+            "name": file["name"],
+            "path": file["path"],
+            "category": file["category"],
+            "size": file["size"],
+            "modified": file["modified"]
+        }
+
+    def _trigram_candidates(self, directory_path: str, dir_index: Dict, query_lower: str) -> List[Dict]:
+        """
+        Get the candidate files for a substring query via the trigram index
+
+        The inverted index maps each 3-gram of a lowercase filename to the
+        files containing it; intersecting the query's posting lists leaves
+        only files that can possibly match, so the substring verification
+        runs over a handful of candidates instead of every file.
+
+        Args:
+            directory_path: Path of the indexed directory
+            dir_index: The directory's index data
+            query_lower: Lowercase query of length >= 3
+
+        Returns:
+            List of candidate file entries
+        """
+        files = dir_index["files"]
+        signature = dir_index.get("last_indexed")
+
+        cached = self._trigram_cache.get(directory_path)
+        if cached is not None and cached[0] == signature:
+            trigrams = cached[1]
+        else:
+            trigrams = {}
+            for idx, file in enumerate(files):
+                name = file.get("name_lower") or file["name"].lower()
+                for i in range(len(name) - 2):
+                    trigrams.setdefault(name[i:i + 3], set()).add(idx)
+            self._trigram_cache[directory_path] = (signature, trigrams)
+
+        candidate_ids = None
+        for i in range(len(query_lower) - 2):
+            posting = trigrams.get(query_lower[i:i + 3])
+            if not posting:
+                return []
+            candidate_ids = set(posting) if candidate_ids is None else candidate_ids & posting
+            if not candidate_ids:
+                return []
+
+        return [files[idx] for idx in sorted(candidate_ids)]
+
+    def search(self, query: str, vector_store_name: str = "default", max_results: int = 5,
+               render_text: bool = True) -> Dict:
         """
         Search in a vector store
         
@@ -337,6 +552,9 @@ class FileSearchManager:
             query: Search query
             vector_store_name: Name of the vector store to search in
             max_results: Maximum number of results to return
+            render_text: Build and print the human-readable result text.
+                The reasoning pipeline passes False since it consumes the
+                structured list directly.
             
         Returns:
             Search results
@@ -375,10 +593,15 @@ class FileSearchManager:
             
             # For testing, we'll simulate a search response
             # In a production environment, this would use the OpenAI responses.create API with file_search
-            
+
             # Find directories indexed in this vector store
             directories = self.vector_stores[vector_store_name].get("directories", [])
-            
+
+            # Nothing indexed in this store: answer immediately instead of
+            # running the full search/rendering machinery
+            if not directories:
+                return {"error": "No directories have been indexed for searching. Please index a directory first."}
+
             # Generate a simulated response
             print(f"Searching for '{query}' in vector store '{vector_store_name}'")
             print(f"This is a simulated search since vector_stores API is not available")
@@ -399,91 +622,73 @@ class FileSearchManager:
                     query_lower = query.lower()
                     
                     print(f"Searching for '{query_lower}' in {len(dir_index['files'])} files")
-                    
-                    # Search through files
-                    for file in dir_index["files"]:
-                        file_name = file["name"].lower()
+
+                    # Narrow to trigram candidates when the query is long
+                    # enough; short queries fall back to the linear scan
+                    if len(query_lower) >= 3:
+                        candidate_files = self._trigram_candidates(directory_path, dir_index, query_lower)
+                    else:
+                        candidate_files = dir_index["files"]
+
+                    # Search through files. Indexes built before the
+                    # lowercase fields existed get them filled in lazily.
+                    for file in candidate_files:
+                        file_name = file.get("name_lower") or file.setdefault("name_lower", file["name"].lower())
                         # Check if query is in file name (case-insensitive)
                         if query_lower in file_name:
                             print(f"Found match: {file['name']}")
-                            results.append({
-                                "name": file["name"],
-                                "path": file["path"],
-                                "category": file["category"],
-                                "size": file["size"],
-                                "modified": file["modified"]
-                            })
+                            results.append(self._result_entry(file))
                     
                     # If still no results, try searching in file paths
                     if not results:
                         for file in dir_index["files"]:
-                            file_path = file["path"].lower()
+                            file_path = file.get("path_lower") or file.setdefault("path_lower", file["path"].lower())
                             if query_lower in file_path:
                                 print(f"Found path match: {file['path']}")
-                                results.append({
-                                    "name": file["name"],
-                                    "path": file["path"],
-                                    "category": file["category"],
-                                    "size": file["size"],
-                                    "modified": file["modified"]
-                                })
+                                results.append(self._result_entry(file))
                             
                     # If no results found by filename or path, try searching within directories too
                     if not results:
                         for directory in dir_index.get("directories", []):
-                            if query_lower in directory.get("path", "").lower():
+                            if query_lower in (directory.get("path_lower") or directory.get("path", "").lower()):
                                 # Get files in this matching directory
                                 parent_path = directory["path"]
                                 for file in dir_index["files"]:
                                     if file["path"].startswith(parent_path):
-                                        results.append({
-                                            "name": file["name"],
-                                            "path": file["path"],
-                                            "category": file["category"],
-                                            "size": file["size"],
-                                            "modified": file["modified"]
-                                        })
+                                        results.append(self._result_entry(file))
             
             # If we have no indexed directories at all, return an error
             if not searched_dirs:
                 return {"error": "No directories have been indexed for searching. Please index a directory first."}
                 
-            # Create a mock response object
-            # Create a custom result object that can be displayed
+            # Create a custom result object that can be displayed. The
+            # rendered text (and its print) only exists for command-line
+            # use; reasoning callers skip it entirely
             result_text = ""
-            if results:
-                result_text = f"I found {len(results)} files related to '{query}':\n\n"
-                for i, res in enumerate(results[:max_results], 1):
-                    result_text += f"{i}. {res['name']} ({res['category']})\n"
-                    result_text += f"   Located at: {res['path']}\n"
-                    result_text += f"   Size: {res['size']} bytes, Modified: {res['modified']}\n\n"
-            else:
-                result_text = f"I couldn't find any files related to '{query}' in your indexed directories.\n"
-                result_text += f"The following directories were searched:\n"
-                for d in searched_dirs:
-                    result_text += f"- {d}\n"
-            
-            # Print the results directly for command-line use
-            print(f"\n{result_text}")
-            
-            # Create a mock response object for API use
-            class MockResponse:
-                def __init__(self, text):
-                    self.text = text
-                    # Create a structure similar to what OpenAI API would return
-                    self.output = [
-                        {
-                            "type": "message",
-                            "content": [
-                                {
-                                    "text": text
-                                }
-                            ]
-                        }
-                    ]
-            
-            response = MockResponse(result_text)
+            if render_text:
+                if results:
+                    result_text = f"I found {len(results)} files related to '{query}':\n\n"
+                    for i, res in enumerate(results[:max_results], 1):
+                        result_text += f"{i}. {res['name']} ({res['category']})\n"
+                        result_text += f"   Located at: {res['path']}\n"
+                        result_text += f"   Size: {res['size']} bytes, Modified: {res['modified']}\n\n"
+                else:
+                    result_text = f"I couldn't find any files related to '{query}' in your indexed directories.\n"
+                    result_text += f"The following directories were searched:\n"
+                    for d in searched_dirs:
+                        result_text += f"- {d}\n"
+
+                # Print the results directly for command-line use
+                print(f"\n{result_text}")
             
+            response = _SearchResponse(result_text)
+            # Attach the structured list so downstream parsing can skip
+            # regex-recovering what we already have. Capped at max_results
+            # like the rendered text (which the regex fallback parses), so
+            # the fast path is behavior-preserving for reasoning steps
+            # that act on the parsed files.
+            response.structured = results[:max_results]
+
             return {
                 "success": True,
                 "response": response,
@@ -513,12 +718,11 @@ class FileSearchManager:
                 return self.vector_stores[vector_store_name].get("directories", [])
             return []
         else:
-            # Get all indexed directories
-            for name, store_info in self.vector_stores.items():
-                indexed_dirs.extend(store_info.get("directories", []))
-            
-            # Remove duplicates
-            return list(set(indexed_dirs))
+            # The deduplicated set is maintained incrementally; sorted so
+            # the listing is stable across calls - this feeds the system
+            # prompt, and a shuffled order would bust provider-side prompt
+            # caching every turn
+            return sorted(self._all_indexed_dirs)
     
     # --- New methods for integration with reasoning system ---
     
@@ -545,25 +749,30 @@ class FileSearchManager:
             return parsed
         
         # Extract raw text for context
-        if "response" in results and hasattr(results["response"], "text"):
-            parsed["raw_text"] = results["response"].text
-        
-        # Extract file information
-        files = []
-        text = parsed["raw_text"]
-        
-        # Parse the text to extract file information
-        file_entries = re.findall(r'(\d+)\.\s+([^\n]+)\s+\(([^\)]+)\)\s+Located\s+at:\s+([^\n]+)\s+Size:\s+(\d+)\s+bytes,\s+Modified:\s+([^\n]+)', text)
-        
-        for entry in file_entries:
-            files.append({
-                "name": entry[1].strip(),
-                "category": entry[2].strip(),
-                "path": entry[3].strip(),
-                "size": int(entry[4]),
-                "modified": entry[5].strip()
-            })
-        
+        response = results.get("response")
+        if response is not None and hasattr(response, "text"):
+            parsed["raw_text"] = response.text
+
+        # Use the structured file list straight off the response when the
+        # search attached it; the regex parse of the rendered text is only
+        # the fallback for legacy text-only responses. The list is aliased,
+        # not copied - search builds it fresh per call and nothing else
+        # holds it
+        if response is not None and getattr(response, "structured", None) is not None:
+            files = response.structured
+        else:
+            files = []
+            file_entries = _FILE_ENTRY_RE.findall(parsed["raw_text"])
+
+            for entry in file_entries:
+                files.append({
+                    "name": entry[1].strip(),
+                    "category": entry[2].strip(),
+                    "path": entry[3].strip(),
+                    "size": int(entry[4]),
+                    "modified": entry[5].strip()
+                })
+
         parsed["files"] = files
         parsed["success"] = True
         
@@ -577,26 +786,36 @@ class FileSearchManager:
         }
         
         if files:
-            # Categorize files
+            # One pass with local refs: histogram growth via dict.get and
+            # inline newest/largest tracking, instead of repeated nested
+            # dict lookups and membership tests per file
+            categories = summary["categories"]
+            extensions = summary["extensions"]
+            newest = None
+            largest = None
+
             for file in files:
                 # Count by category
                 category = file["category"]
-                if category not in summary["categories"]:
-                    summary["categories"][category] = 0
-                summary["categories"][category] += 1
-                
-                # Count by extension
-                ext = os.path.splitext(file["name"])[1].lower()
-                if ext not in summary["extensions"]:
-                    summary["extensions"][ext] = 0
-                summary["extensions"][ext] += 1
-                
+                categories[category] = categories.get(category, 0) + 1
+
+                # Count by extension, memoized on the entry since filters
+                # recompute the same value otherwise
+                ext = file.get("_ext")
+                if ext is None:
+                    ext = os.path.splitext(file["name"])[1].lower()
+                    file["_ext"] = ext
+                extensions[ext] = extensions.get(ext, 0) + 1
+
                 # Track newest and largest file
-                if not summary["newest_file"] or file["modified"] > summary["newest_file"]["modified"]:
-                    summary["newest_file"] = file
-                
-                if not summary["largest_file"] or file["size"] > summary["largest_file"]["size"]:
-                    summary["largest_file"] = file
+                if newest is None or file["modified"] > newest["modified"]:
+                    newest = file
+
+                if largest is None or file["size"] > largest["size"]:
+                    largest = file
+
+            summary["newest_file"] = newest
+            summary["largest_file"] = largest
         
         parsed["summary"] = summary
         return parsed
@@ -619,8 +838,8 @@ class FileSearchManager:
             query += f" in:{directory}"
         
         # Perform search
-        results = self.search(query, vector_store)
-        
+        results = self.search(query, vector_store, render_text=False)
+
         # Parse results
         return self.parse_search_results(results)
     
@@ -646,8 +865,8 @@ class FileSearchManager:
             query += f" in:{directory}"
         
         # Perform search
-        results = self.search(query, vector_store)
-        
+        results = self.search(query, vector_store, render_text=False)
+
         # Parse results
         return self.parse_search_results(results)
     
@@ -669,8 +888,8 @@ class FileSearchManager:
             query += f" in:{directory}"
         
         # Perform search
-        results = self.search(query, vector_store)
-        
+        results = self.search(query, vector_store, render_text=False)
+
         # Parse results
         return self.parse_search_results(results)
     
@@ -692,8 +911,8 @@ class FileSearchManager:
             query += f" in:{directory}"
         
         # Perform search
-        results = self.search(query, vector_store)
-        
+        results = self.search(query, vector_store, render_text=False)
+
         # Parse results
         return self.parse_search_results(results)
     
@@ -711,33 +930,49 @@ class FileSearchManager:
         """
         if not filters:
             return parsed_results["files"]
-        
-        filtered_files = []
-        
-        for file in parsed_results["files"]:
-            include = True
-            
-            # Apply each filter
-            for key, value in filters.items():
-                if key == "min_size" and file.get("size", 0) < value:
-                    include = False
-                    break
-                elif key == "max_size" and file.get("size", 0) > value:
-                    include = False
-                    break
-                elif key == "category" and file.get("category", "") != value:
-                    include = False
-                    break
-                elif key == "extension":
-                    file_ext = os.path.splitext(file.get("name", ""))[1].lower()
-                    if file_ext != value.lower():
-                        include = False
-                        break
-            
-            if include:
-                filtered_files.append(file)
-        
-        return filtered_files
+
+        # Compile the filter dict once into predicate callables, so the
+        # per-file loop is a short-circuiting all() instead of re-matching
+        # filter-key strings for every file
+        predicates = self._compile_filters(filters)
+
+        return [file for file in parsed_results["files"]
+                if all(predicate(file) for predicate in predicates)]
+
+    @staticmethod
+    def _compile_filters(filters: Dict) -> List:
+        """
+        Compile a filter dict into per-file predicate callables
+
+        Args:
+            filters: Filter specification (min_size, max_size, category,
+                extension)
+
+        Returns:
+            List of callables taking a file entry and returning bool
+        """
+        predicates = []
+
+        for key, value in filters.items():
+            if key == "min_size":
+                predicates.append(lambda file, v=value: file.get("size", 0) >= v)
+            elif key == "max_size":
+                predicates.append(lambda file, v=value: file.get("size", 0) <= v)
+            elif key == "category":
+                predicates.append(lambda file, v=value: file.get("category", "") == v)
+            elif key == "extension":
+                ext_filter = value.lower()
+
+                def match_extension(file, v=ext_filter):
+                    ext = file.get("_ext")
+                    if ext is None:
+                        ext = os.path.splitext(file.get("name", ""))[1].lower()
+                        file["_ext"] = ext
+                    return ext == v
+
+                predicates.append(match_extension)
+
+        return predicates
     
     def execute_search_step(self, step: ReasoningStep) -> Dict:
         """
@@ -781,7 +1016,8 @@ class FileSearchManager:
             results = self.search(
                 query=step_args.get("query", ""),
                 vector_store_name=step_args.get("vector_store", "default"),
-                max_results=step_args.get("max_results", 5)
+                max_results=step_args.get("max_results", 5),
+                render_text=False
             )
             results = self.parse_search_results(results)
         
@@ -1,23 +1,309 @@
+"""
+OpenAI Response Module
+
+Single implementation of the conversation layer: per-session histories,
+the streaming/tool-calling run_conversation flow, and the reasoning-chain
+planning and execution built on the shared lazy client. (Earlier forks of
+this project carried several diverging copies of this module; this tree
+keeps exactly one.)
+"""
+
+import asyncio
 import os
-import json
+import re
 import uuid
+from collections import OrderedDict, deque
+import httpx
 from dotenv import load_dotenv
 from openai import AsyncOpenAI
 from src.commands.command_executor import execute_commands, execute_background_command
+from src.utils import fastjson
 from src.utils.directory_manager import directory_manager
 from src.nlp.file_search import file_search_manager
 from src.core.reasoning import reasoning_engine
 
-load_dotenv()
+from functools import lru_cache
+
+@lru_cache(maxsize=1)
+def get_client() -> AsyncOpenAI:
+    """
+    Get the shared AsyncOpenAI client, created on first use.
+
+    Importing this module no longer pays for .env discovery or client
+    construction (and no longer requires an API key to be present). The
+    client rides an HTTP transport with a larger keepalive pool than
+    httpx's default ten connections, so concurrent completions (streamed
+    chat + warmup) reuse warm TLS sessions instead of re-handshaking.
+    HTTP/2 multiplexing would help further but needs the optional h2
+    package, which isn't a dependency of this project.
+    """
+    load_dotenv()
+    http_client = httpx.AsyncClient(
+        timeout=60.0,
+        limits=httpx.Limits(
+            max_connections=100,
+            max_keepalive_connections=50,
+            keepalive_expiry=60.0,
+        ),
+    )
+    return AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), http_client=http_client)
+
+async def close_client():
+    """Close the shared client's HTTP transport. Called once on shutdown."""
+    if get_client.cache_info().currsize:
+        await get_client().close()
+
+async def warm_connection():
+    """
+    Pre-establish the DNS/TLS session to the OpenAI API so the first real
+    request of the session skips the cold handshake. Failures are ignored -
+    this is purely an optimization.
+    """
+    try:
+        await get_client().models.list()
+    except Exception:
+        pass
+
+# Multi-step markers for the local complexity heuristic: sequencing
+# connectors and chained imperatives that signal a task needing a plan
+_REASONING_MARKERS_RE = re.compile(
+    r"\b(and then|after that|first\b.*\bthen|once you|followed by|"
+    r"for each|one by one|step by step)\b"
+)
+
+def needs_reasoning(text: str) -> bool:
+    """
+    Decide locally whether a request needs multi-step reasoning.
+
+    This used to be a dedicated GPT-4o round-trip before every turn,
+    doubling latency and token cost; sequencing connectors plus a length
+    threshold catch the same cases without leaving the process.
+
+    Args:
+        text: The user's request
+
+    Returns:
+        True when the request looks like a multi-step task
+    """
+    lowered = text.lower()
+    if _REASONING_MARKERS_RE.search(lowered):
+        return True
+
+    # Very long requests tend to bundle several actions
+    return len(lowered.split()) > 40
+
+# Tool schemas are data-independent; built once at import instead of a
+# fresh literal per turn. They stay as dicts handed to the SDK: splicing
+# pre-encoded JSON bytes into the request body would skip the SDK's
+# per-call serialization (~ms at high QPS) but also its retry, error and
+# streaming handling - the wrong trade for a single-user assistant.
+_TOOLS_SIMPLE = [
+    {
+        "type": "function",
+        "function": {
+            "name": "execute_commands",
+            "description": "Executes terminal commands based on the user input",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "commands": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "List of terminal commands to execute"
+                    },
+                    "background": {
+                        "type": "boolean",
+                        "description": "Whether to run the command in the background"
+                    }
+                },
+                "required": ["commands", "background"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "search_files",
+            "description": "Search for files in indexed directories",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "query": {
+                        "type": "string",
+                        "description": "Search query"
+                    },
+                    "vector_store": {
+                        "type": "string",
+                        "description": "Name of the vector store to search in (default: 'default')"
+                    }
+                },
+                "required": ["query"]
+            }
+        }
+    }
+]
+
+# The planning tool schema, data-independent and built once at import
+_PLAN_TOOLS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "plan_reasoning",
+            "description": "Create a step-by-step reasoning plan",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "steps": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "description": {
+                                    "type": "string",
+                                    "description": "Description of the step"
+                                },
+                                "tool_name": {
+                                    "type": "string",
+                                    "enum": ["execute_commands", "search_files", "synthesize"],
+                                    "description": "Tool to use for this step (or 'synthesize' for reasoning)"
+                                },
+                                "tool_args": {
+                                    "type": "object",
+                                    "description": "Arguments for the tool"
+                                },
+                                "depends_on": {
+                                    "type": "array",
+                                    "items": {"type": "integer"},
+                                    "description": "Indices of earlier steps this step needs results from; use [] for steps that can run independently"
+                                }
+                            },
+                            "required": ["description"]
+                        }
+                    },
+                    "response_template": {
+                        "type": "string",
+                        "description": "Template for the final answer, using {step_1_output}, {step_2_output}, ... placeholders; lets the final response be composed without another model call"
+                    }
+                },
+                "required": ["steps"]
+            }
+        }
+    }
+]
+
+# System prompts cached per (directory, index) version so unchanged
+# metadata doesn't trigger a rebuild of the multi-KB strings every turn
+_prompt_cache = {}
+
+async def _directory_context():
+    """Build the dynamic directory/index portion of the system prompts
+
+    Both lookups run in worker threads concurrently - they can touch the
+    filesystem, and a cache miss shouldn't stall the event loop.
+    """
+    directory_info, indexed_dirs = await asyncio.gather(
+        asyncio.to_thread(directory_manager.get_all_directories),
+        asyncio.to_thread(file_search_manager.get_indexed_directories),
+    )
+    indexed_dirs_info = ""
+    if indexed_dirs:
+        indexed_dirs_info = "You have access to the following indexed directories for file search:\n"
+        for i, dir_path in enumerate(indexed_dirs, 1):
+            indexed_dirs_info += f"{i}. {dir_path}\n"
+    return directory_info, indexed_dirs_info
+
+async def _cached_system_message(kind, builder):
+    """
+    Get a system message, rebuilding only when the directory or index
+    metadata changed since the cached version
+    """
+    version = (directory_manager.version, file_search_manager.version)
+    cached = _prompt_cache.get(kind)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    message = builder(*await _directory_context())
+    _prompt_cache[kind] = (version, message)
+    return message
 
-client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Per-session conversation histories, each bounded to the last 10
+# messages (the deque evicts the oldest entries on append). Keying on a
+# session id keeps concurrent conversations from interleaving appends in
+# one shared list.
+#
+# The fixed recency window is a deliberate choice: a retrieval-backed
+# tier for older turns (embed evicted messages, recall by similarity)
+# would shrink per-turn prompt tokens further, but it needs an embedding
+# call per turn plus a vector index - neither fits this project's
+# dependency footprint, and at 10 messages the window is already small.
+_sessions = {}
 
-# Initialize an empty conversation history
-conversation_history = []
+def _history_for(session_id="default"):
+    """Get the conversation history deque for a session
+
+    Entries are kept as plain dicts on purpose: that is the exact wire
+    shape chat.completions consumes, so messages go into the request
+    without any per-turn conversion. A slotted message class would shave
+    bytes per entry but re-add a dict build for all ten messages on every
+    call - a net loss at this window size.
+    """
+    history = _sessions.get(session_id)
+    if history is None:
+        history = deque(maxlen=10)
+        _sessions[session_id] = history
+    return history
+
+# The default session's history, kept as a module-level alias for
+# existing callers
+conversation_history = _history_for()
 
 # Active reasoning chains
 active_reasoning = {}
 
+# Cached reasoning plans keyed on the normalized query, so repeats and
+# near-identical requests skip the planning LLM round-trip entirely
+_plan_cache = OrderedDict()
+PLAN_CACHE_MAX = 256
+
+def _plan_cache_key(query):
+    """Normalize a query for plan-cache lookups"""
+    return " ".join(query.lower().split())
+
+async def _run_cached_plan(query, plan):
+    """Build a chain from a cached plan and execute it"""
+    chain_id = reasoning_engine.create_chain(query)
+    reasoning_engine.handle_request(chain_id, "plan", plan)
+    chain = reasoning_engine.get_chain(chain_id)
+
+    await execute_plan(chain_id)
+
+    if chain.final_response:
+        return chain.final_response
+    return f"I'll help you with your request: '{query}'\n\nI've broken this down into {len(chain.steps)} steps."
+
+# Cap on tool output fed back into the model; beyond this the middle is
+# elided so one chatty command can't balloon every subsequent prompt
+TOOL_OUTPUT_MAX_CHARS = 8000
+
+def _bounded(output, max_chars=TOOL_OUTPUT_MAX_CHARS):
+    """
+    Bound tool output for the prompt, keeping the head and tail
+
+    Args:
+        output: Raw tool output text
+        max_chars: Maximum characters to keep
+
+    Returns:
+        The output, with the middle elided when over the cap
+    """
+    if len(output) <= max_chars:
+        return output
+
+    head = max_chars * 3 // 4
+    tail = max_chars - head
+    omitted = len(output) - head - tail
+    return f"{output[:head]}\n...[truncated {omitted} characters]...\n{output[-tail:]}"
+
 async def search_files(query, vector_store="default"):
     """Execute file search using the file search manager"""
     print(f"Searching for files with query: '{query}' in vector store '{vector_store}'")
@@ -44,24 +330,12 @@ async def run_reasoning_chain(query):
     Returns:
         Assistant's response with reasoning
     """
-    global conversation_history
-    
-    # Get system context
-    directory_info = directory_manager.get_all_directories()
-    indexed_dirs = file_search_manager.get_indexed_directories()
-    indexed_dirs_info = ""
-    if indexed_dirs:
-        indexed_dirs_info = "You have access to the following indexed directories for file search:\n"
-        for i, dir_path in enumerate(indexed_dirs, 1):
-            indexed_dirs_info += f"{i}. {dir_path}\n"
-    
-    # Create reasoning system prompt
-    system_message = {"role": "system", "content": f"""You are a virtual assistant with multi-step reasoning capabilities. You can break down complex tasks into logical steps and execute them in sequence.
-
-You have access to the following directories:
-{directory_info}
-
-{indexed_dirs_info}
+    # Create reasoning system prompt. Static instructions first, dynamic
+    # directory info last, so turns share the longest stable prefix for
+    # provider-side prompt caching; cached until the metadata changes
+    system_message = await _cached_system_message("reasoning", lambda directory_info, indexed_dirs_info: {
+        "role": "system",
+        "content": f"""You are a virtual assistant with multi-step reasoning capabilities. You can break down complex tasks into logical steps and execute them in sequence.
 
 ## Instructions for Multi-step Reasoning:
 1. Analyze the user's request to determine if it requires multiple steps
@@ -76,54 +350,30 @@ You have access to the following directories:
 3. plan_reasoning: Create a step-by-step plan for complex tasks
 
 When you need to execute multiple steps where the output of one step feeds into another, use the planning capability.
-"""}
-    
+
+You have access to the following directories:
+{directory_info}
+
+{indexed_dirs_info}"""})
+
+    # Serve a cached plan when this query (modulo case/whitespace) has
+    # been planned before
+    plan_key = _plan_cache_key(query)
+    cached_plan = _plan_cache.get(plan_key)
+    if cached_plan is not None:
+        _plan_cache.move_to_end(plan_key)
+        return await _run_cached_plan(query, cached_plan)
+
     # Start the planning process
     planning_messages = [
         system_message,
         {"role": "user", "content": f"I need to break down this task into logical steps: '{query}'\nCreate a step-by-step plan to accomplish this."}
     ]
     
-    planning_response = await client.chat.completions.create(
+    planning_response = await get_client().chat.completions.create(
         model="gpt-4o",
         messages=planning_messages,
-        tools=[
-            {
-                "type": "function",
-                "function": {
-                    "name": "plan_reasoning",
-                    "description": "Create a step-by-step reasoning plan",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "steps": {
-                                "type": "array",
-                                "items": {
-                                    "type": "object",
-                                    "properties": {
-                                        "description": {
-                                            "type": "string",
-                                            "description": "Description of the step"
-                                        },
-                                        "tool_name": {
-                                            "type": "string",
-                                            "enum": ["execute_commands", "search_files", "synthesize"],
-                                            "description": "Tool to use for this step (or 'synthesize' for reasoning)"
-                                        },
-                                        "tool_args": {
-                                            "type": "object",
-                                            "description": "Arguments for the tool"
-                                        }
-                                    },
-                                    "required": ["description"]
-                                }
-                            }
-                        },
-                        "required": ["steps"]
-                    }
-                }
-            }
-        ],
+        tools=_PLAN_TOOLS,
         tool_choice="auto"
     )
     
@@ -136,20 +386,27 @@ When you need to execute multiple steps where the output of one step feeds into
     if response_message.tool_calls:
         for tool_call in response_message.tool_calls:
             if tool_call.function and tool_call.function.name == "plan_reasoning":
-                plan = json.loads(tool_call.function.arguments)
-                
+                plan = fastjson.loads(tool_call.function.arguments)
+
+                # Remember the plan for repeat queries
+                _plan_cache[plan_key] = plan
+                while len(_plan_cache) > PLAN_CACHE_MAX:
+                    _plan_cache.popitem(last=False)
+
                 # Add steps to reasoning chain
                 reasoning_engine.handle_request(chain_id, "plan", plan)
                 
                 # Start executing the plan (first step)
                 chain = reasoning_engine.get_chain(chain_id)
-                current_step = chain.get_current_step()
-                
-                # Execute the first step
-                step_result = await execute_reasoning_step(chain_id, current_step)
-                
-                # Return initial response to user
-                return f"I'll help you with your request: '{query}'\n\nI've broken this down into {len(chain.steps)} steps. Working on step 1: {current_step.description}"
+
+                # Execute the full plan in dependency waves
+                await execute_plan(chain_id)
+
+                if chain.final_response:
+                    return chain.final_response
+
+                # Fallback progress message when no final response emerged
+                return f"I'll help you with your request: '{query}'\n\nI've broken this down into {len(chain.steps)} steps."
     
     # Fallback if planning fails
     return await run_conversation(query)
@@ -191,15 +448,10 @@ async def execute_reasoning_step(chain_id, step):
         # This is a reasoning step without a specific tool
         system_message = {"role": "system", "content": "You are an assistant helping with a multi-step reasoning process. Analyze the information provided and generate insights."}
         
-        # Get previous steps and their results
+        # Previous steps' display text accumulates as steps complete, so
+        # this is a join over prebuilt parts instead of an O(N) rebuild
         chain = reasoning_engine.get_chain(chain_id)
-        prev_steps = []
-        for i in range(step.step_id):
-            prev_step = chain.steps[i]
-            if prev_step.is_completed:
-                prev_steps.append(f"Step {i+1}: {prev_step.description}\nResult: {prev_step.result}")
-        
-        prev_steps_text = "\n\n".join(prev_steps)
+        prev_steps_text = "\n\n".join(chain.steps_text_parts)
         
         user_message = f"Based on the previous steps:\n\n{prev_steps_text}\n\nComplete the following reasoning step: {step.description}"
         
@@ -208,29 +460,66 @@ async def execute_reasoning_step(chain_id, step):
             {"role": "user", "content": user_message}
         ]
         
-        response = await client.chat.completions.create(
+        response = await get_client().chat.completions.create(
             model="gpt-4o",
             messages=messages
         )
         
         result = response.choices[0].message.content
     
-    # Record result and advance chain
-    execution_result = reasoning_engine.execute_step(chain_id, result)
-    
-    # Check if there's another step to execute
-    if execution_result.get("has_next_step", False):
-        chain = reasoning_engine.get_chain(chain_id)
-        next_step = chain.get_current_step()
-        
-        # Execute the next step
-        await execute_reasoning_step(chain_id, next_step)
-    else:
-        # Complete the chain with a final response
-        await complete_reasoning_chain(chain_id)
-    
     return result
 
+async def execute_plan(chain_id):
+    """
+    Execute all planned steps of a chain in dependency waves
+
+    Steps whose declared dependencies are satisfied run concurrently via
+    asyncio.gather (independent search/command steps overlap); steps
+    without an explicit depends_on keep the safe sequential default of
+    depending on the previous step. Replaces the old recursive
+    one-step-at-a-time execution.
+
+    Args:
+        chain_id: ID of the reasoning chain
+    """
+    chain = reasoning_engine.get_chain(chain_id)
+    if not chain:
+        return
+
+    done = set()
+    pending = list(chain.steps)
+
+    while pending:
+        ready = []
+        for step in pending:
+            if step.depends_on is not None:
+                deps = step.depends_on
+            elif step.step_id > 0:
+                deps = (step.step_id - 1,)
+            else:
+                deps = ()
+            if all(dep in done for dep in deps):
+                ready.append(step)
+
+        if not ready:
+            # Broken dependency declaration; degrade to plan order
+            ready = [pending[0]]
+
+        results = await asyncio.gather(
+            *(execute_reasoning_step(chain_id, step) for step in ready)
+        )
+
+        for step, result in zip(ready, results):
+            step.set_result(result)
+            chain.append_step_text(step)
+            done.add(step.step_id)
+            pending.remove(step)
+
+        chain.current_step_idx = len(done)
+
+    # Complete the chain with a final response
+    await complete_reasoning_chain(chain_id)
+
 async def complete_reasoning_chain(chain_id):
     """
     Complete a reasoning chain with a final response
@@ -245,14 +534,16 @@ async def complete_reasoning_chain(chain_id):
     
     if not chain:
         return "Error: Reasoning chain not found."
-    
-    # Get all steps and their results
-    steps_info = []
-    for i, step in enumerate(chain.steps):
-        if step.is_completed:
-            steps_info.append(f"Step {i+1}: {step.description}\nResult: {step.result}")
-    
-    steps_text = "\n\n".join(steps_info)
+
+    # A template delivered with the plan means the final response can be
+    # composed locally - no synthesis round-trip needed
+    templated = chain.fill_response_template()
+    if templated:
+        reasoning_engine.complete_chain(chain_id, templated)
+        return templated
+
+    # The per-step display text was accumulated as steps completed
+    steps_text = "\n\n".join(chain.steps_text_parts)
     
     # Generate final response
     system_message = {"role": "system", "content": "You are an assistant completing a multi-step reasoning task. Synthesize the results of all steps into a coherent final response that directly answers the user's original query."}
@@ -264,7 +555,7 @@ async def complete_reasoning_chain(chain_id):
         {"role": "user", "content": user_message}
     ]
     
-    response = await client.chat.completions.create(
+    response = await get_client().chat.completions.create(
         model="gpt-4o",
         messages=messages
     )
@@ -276,156 +567,219 @@ async def complete_reasoning_chain(chain_id):
     
     return final_response
 
-async def run_conversation(transcription):
+async def _run_tool_call(tool_call):
+    """
+    Execute one normalized tool-call dict and return its output
+    """
+    function_name = tool_call["function"]["name"]
+    function_args = fastjson.loads(tool_call["function"]["arguments"])
+    output = ""
+
+    if function_name == "execute_commands":
+        commands = function_args["commands"]
+        background = function_args["background"]
+
+        if background:
+            output = await execute_background_command(commands[0])
+        else:
+            output = await execute_commands(commands)
+
+    elif function_name == "search_files":
+        query = function_args["query"]
+        vector_store = function_args.get("vector_store", "default")
+
+        output = await search_files(query, vector_store)
+
+    return function_name, output
+
+async def _stream_with_tools(messages, history):
+    """
+    Stream a completion, executing any tool calls it makes.
+
+    Text deltas are yielded the moment they arrive, while tool-call
+    deltas are assembled on the side - the model can emit a spoken
+    preamble ("Creating that folder now.") in the same completion as its
+    tool calls, and the calls must still run. Once the stream ends, any
+    assembled calls are executed and the follow-up completion is
+    streamed the same way, so the caller hears preamble, then result.
+    """
+    response_stream = await get_client().chat.completions.create(
+        model="gpt-4o",
+        messages=messages,
+        tools=_TOOLS_SIMPLE,
+        tool_choice="auto",
+        stream=True
+    )
+
+    parts = []
+    tool_calls = {}
+
+    async for chunk in response_stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta
+
+        if delta.tool_calls:
+            for tc in delta.tool_calls:
+                entry = tool_calls.setdefault(tc.index, {
+                    "id": "",
+                    "type": "function",
+                    "function": {"name": "", "arguments": ""},
+                })
+                if tc.id:
+                    entry["id"] = tc.id
+                if tc.function:
+                    if tc.function.name:
+                        entry["function"]["name"] = tc.function.name
+                    if tc.function.arguments:
+                        entry["function"]["arguments"] += tc.function.arguments
+        if delta.content:
+            parts.append(delta.content)
+            yield delta.content
+
+    if not tool_calls:
+        # Plain text response
+        history.append({"role": "assistant", "content": "".join(parts)})
+        return
+
+    # Record the assistant turn (preamble text, if any, plus its calls),
+    # execute the calls, then stream the follow-up response
+    tool_call_dicts = [tool_calls[i] for i in sorted(tool_calls)]
+    assistant_message = {
+        "role": "assistant",
+        "content": "".join(parts) or None,
+        "tool_calls": tool_call_dicts,
+    }
+    history.append(assistant_message)
+    messages.append(assistant_message)
+
+    for tool_call in tool_call_dicts:
+        function_name, output = await _run_tool_call(tool_call)
+
+        # Bounded so a huge command output doesn't balloon this and
+        # every later prompt
+        tool_response = {"role": "tool", "tool_call_id": tool_call["id"], "name": function_name, "content": _bounded(output)}
+        history.append(tool_response)
+        messages.append(tool_response)
+
+    final_stream = await get_client().chat.completions.create(
+        model="gpt-4o",
+        messages=messages,
+        stream=True
+    )
+
+    final_parts = []
+    async for chunk in final_stream:
+        if not chunk.choices:
+            continue
+        piece = chunk.choices[0].delta.content
+        if piece:
+            final_parts.append(piece)
+            yield piece
+
+    history.append({"role": "assistant", "content": "".join(final_parts)})
+
+async def run_conversation(transcription, session_id="default", stream=False):
     """
     Run a regular conversation without multi-step reasoning
     
     Args:
         transcription: User's message
+        session_id: Conversation session whose history to use
+        stream: When True, plain-text responses come back as an async
+            iterator of text deltas (tool-using turns still execute their
+            tools first, then stream the final response), so the caller
+            can start speaking while the model is generating
         
     Returns:
-        Assistant's response
+        Assistant's response as a string, or an async iterator of text
+        deltas when streaming
     """
-    global conversation_history
-    directory_info = directory_manager.get_all_directories()
-    
-    # Get indexed directories information
-    indexed_dirs = file_search_manager.get_indexed_directories()
-    indexed_dirs_info = ""
-    if indexed_dirs:
-        indexed_dirs_info = "You have access to the following indexed directories for file search:\n"
-        for i, dir_path in enumerate(indexed_dirs, 1):
-            indexed_dirs_info += f"{i}. {dir_path}\n"
-    
-    system_message = {"role": "system", "content": f"""You are a virtual assistant that responds to questions and can execute terminal commands when necessary. 
+    history = _history_for(session_id)
+    # Static instructions come first and the per-session directory info
+    # last, so the prompt shares the longest possible stable prefix across
+    # turns - that's what provider-side prompt caching keys on. The built
+    # message is cached until the directory/index metadata changes.
+    system_message = await _cached_system_message("conversation", lambda directory_info, indexed_dirs_info: {
+        "role": "system",
+        "content": f"""You are a virtual assistant that responds to questions and can execute terminal commands when necessary.
+
+When referring to these directories in commands, use the full path.
+When searching for files or information within indexed directories, use the file_search tool.
 
 You have access to the following directories:
 {directory_info}
 
-{indexed_dirs_info}
-
-When referring to these directories in commands, use the full path.
-When searching for files or information within indexed directories, use the file_search tool.
-"""}
+{indexed_dirs_info}"""})
     
     # Add the new user message to the conversation history
-    conversation_history.append({"role": "user", "content": transcription})
-    
+    history.append({"role": "user", "content": transcription})
+
     # Prepare the messages for the API call
-    messages = [system_message] + conversation_history
+    messages = [system_message, *history]
     
-    # Check if this request might need multi-step reasoning
-    complexity_check = await client.chat.completions.create(
-        model="gpt-4o",
-        messages=[
-            {"role": "system", "content": "You determine if a user request requires multi-step reasoning. Respond with either 'SIMPLE' or 'COMPLEX'."},
-            {"role": "user", "content": f"Does this request require multiple steps to complete? '{transcription}'"}
-        ],
-        max_tokens=10
-    )
-    
-    complexity_response = complexity_check.choices[0].message.content.strip().upper()
-    
-    # For complex requests, use the reasoning engine
-    if "COMPLEX" in complexity_response and "STEP" in complexity_response:
+    # For complex requests, use the reasoning engine. The check is a local
+    # heuristic - the old per-turn GPT-4o classification round-trip is
+    # gone, which also means there is no second LLM call left to batch
+    # into the main completion: simple turns now cost exactly one request
+    if needs_reasoning(transcription):
         return await run_reasoning_chain(transcription)
     
-    # For simple requests, use the regular conversation flow
-    # Build tools array
-    tools = [
-        {
-            "type": "function",
-            "function": {
-                "name": "execute_commands",
-                "description": "Executes terminal commands based on the user input",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "commands": {
-                            "type": "array",
-                            "items": {"type": "string"},
-                            "description": "List of terminal commands to execute"
-                        },
-                        "background": {
-                            "type": "boolean",
-                            "description": "Whether to run the command in the background"
-                        }
-                    },
-                    "required": ["commands", "background"]
-                }
-            }
-        },
-        {
-            "type": "function",
-            "function": {
-                "name": "search_files",
-                "description": "Search for files in indexed directories",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "query": {
-                            "type": "string",
-                            "description": "Search query"
-                        },
-                        "vector_store": {
-                            "type": "string",
-                            "description": "Name of the vector store to search in (default: 'default')"
-                        }
-                    },
-                    "required": ["query"]
-                }
-            }
-        }
-    ]
+    # For simple requests, use the regular conversation flow with the
+    # shared tools schema. Streaming mode hands back one generator that
+    # yields text deltas as they arrive and runs any tool calls the
+    # completion makes along the way.
+    if stream:
+        return _stream_with_tools(messages, history)
 
-    response = await client.chat.completions.create(
+    response = await get_client().chat.completions.create(
         model="gpt-4o",
         messages=messages,
-        tools=tools,
+        tools=_TOOLS_SIMPLE,
         tool_choice="auto"
     )
 
     response_message = response.choices[0].message
-    
-    # Handle function calls
+    tool_call_dicts = None
+
     if response_message.tool_calls:
+        # Normalize the SDK objects to the plain dict shape the rest
+        # of the flow (and the history) works with
+        tool_call_dicts = [
+            {
+                "id": tc.id,
+                "type": "function",
+                "function": {"name": tc.function.name, "arguments": tc.function.arguments},
+            }
+            for tc in response_message.tool_calls if tc.function
+        ]
+
+    # Handle function calls
+    if tool_call_dicts:
         # Add the assistant's message with the tool calls to both conversation history and current messages
-        assistant_message = {"role": "assistant", "content": None, "tool_calls": response_message.tool_calls}
-        conversation_history.append(assistant_message)
+        assistant_message = {"role": "assistant", "content": None, "tool_calls": tool_call_dicts}
+        history.append(assistant_message)
         messages.append(assistant_message)
-        
-        tool_responses = []
-        
+
         # Process each tool call
-        for tool_call in response_message.tool_calls:
-            if tool_call.function:
-                function_name = tool_call.function.name
-                function_args = json.loads(tool_call.function.arguments)
-                output = ""
-                
-                if function_name == "execute_commands":
-                    commands = function_args["commands"]
-                    background = function_args["background"]
-                    
-                    if background:
-                        output = await execute_background_command(commands[0])
-                    else:
-                        output = await execute_commands(commands)
-                
-                elif function_name == "search_files":
-                    query = function_args["query"]
-                    vector_store = function_args.get("vector_store", "default")
-                    
-                    output = await search_files(query, vector_store)
-                
-                # Create the tool response and add it to both conversation history and current messages
-                tool_response = {"role": "tool", "tool_call_id": tool_call.id, "name": function_name, "content": output}
-                conversation_history.append(tool_response)
-                messages.append(tool_response)
-                tool_responses.append(tool_response)
-        
-        # Get the final response based on the updated messages that include tool calls and responses
-        final_response = await client.chat.completions.create(
+        for tool_call in tool_call_dicts:
+            function_name, output = await _run_tool_call(tool_call)
+
+            # Create the tool response and add it to both conversation
+            # history and current messages; bounded so a huge command
+            # output doesn't balloon this and every later prompt
+            tool_response = {"role": "tool", "tool_call_id": tool_call["id"], "name": function_name, "content": _bounded(output)}
+            history.append(tool_response)
+            messages.append(tool_response)
+
+        # Get the final response based on the updated messages that include
+        # tool calls and responses. chat.completions is stateless, so the
+        # follow-up necessarily re-uploads the whole prompt; cutting that
+        # in half means migrating this integration to the Responses API
+        # (previous_response_id carries the server-side state), which
+        # touches every call in this module and is deliberately not done
+        # piecemeal here.
+        final_response = await get_client().chat.completions.create(
             model="gpt-4o",
             messages=messages
         )
@@ -434,16 +788,17 @@ When searching for files or information within indexed directories, use the file
         # For regular responses
         assistant_response = response_message.content
 
-    # Add the assistant's response to the conversation history
-    conversation_history.append({"role": "assistant", "content": assistant_response})
-    
-    # Trim the conversation history if it gets too long
-    if len(conversation_history) > 10:  # Keep last 10 messages
-        conversation_history = conversation_history[-10:]
+    # Add the assistant's response to the conversation history; the
+    # deque's maxlen keeps only the last 10 messages
+    history.append({"role": "assistant", "content": assistant_response})
 
     return assistant_response
 
 # Function to clear conversation history
-def clear_conversation_history():
-    global conversation_history
-    conversation_history = []
\ No newline at end of file
+def clear_conversation_history(session_id=None):
+    """Clear one session's history, or every session's when id is None"""
+    if session_id is None:
+        for history in _sessions.values():
+            history.clear()
+    else:
+        _history_for(session_id).clear()
\ No newline at end of file
@@ -1,19 +1,46 @@
-from openai import OpenAI
+import asyncio
+import os
+from functools import lru_cache
+from pathlib import Path
 
-def transcribe_audio(file_path, config):
+from openai import AsyncOpenAI
+
+@lru_cache(maxsize=1)
+def get_openai_client(api_key):
     """
-    Transcribe an audio file using OpenAI's Whisper model.
+    Get a shared async OpenAI client for the given API key.
+
+    Building a client per call sets up a new HTTP connection pool, so each
+    transcription would redo the TCP+TLS handshake. Caching on the API key
+    keeps the connection warm across turns while still picking up key changes.
     """
-    # Initialize the OpenAI client with the API key
-    client = OpenAI(api_key=config['OPENAI_API_KEY'])
-    
-    # Open the audio file in binary mode
-    with open(file_path, "rb") as audio_file:
-        # Use OpenAI's audio transcription API to convert speech to text
-        transcription = client.audio.transcriptions.create(
-            model="whisper-1",  # Use the Whisper model for transcription
-            file=audio_file
-        )
-    
+    return AsyncOpenAI(api_key=api_key)
+
+async def transcribe_audio(audio_source, config):
+    """
+    Transcribe audio using OpenAI's Whisper model.
+
+    audio_source is either a path to an audio file or an in-memory WAV
+    buffer as returned by record_audio. The call is fully async: a file
+    path is read in a worker thread and the upload awaits on the shared
+    async client, so a large recording never blocks the event loop.
+    """
+    # Get the shared OpenAI client for this API key
+    client = get_openai_client(config['OPENAI_API_KEY'])
+
+    if isinstance(audio_source, str):
+        # Read the file off the event loop
+        data = await asyncio.to_thread(Path(audio_source).read_bytes)
+        filename = os.path.basename(audio_source)
+    else:
+        # In-memory WAV bytes straight from the recorder
+        data = audio_source.getvalue()
+        filename = "audio.wav"
+
+    transcription = await client.audio.transcriptions.create(
+        model="whisper-1",  # Use the Whisper model for transcription
+        file=(filename, data)
+    )
+
     # Return the transcribed text
-    return transcription.text
\ No newline at end of file
+    return transcription.text
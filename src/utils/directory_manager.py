@@ -2,6 +2,9 @@ import os
 
 class DirectoryManager:
     def __init__(self):
+        # Bumped on every mutation so prompt caches keyed on it can tell
+        # when the directory listing changed
+        self.version = 0
         self.directories = {
             "home": os.path.expanduser("~"),
             "desktop": os.path.join(os.path.expanduser("~"), "Desktop"),
@@ -16,6 +19,7 @@ class DirectoryManager:
     def add_directory(self, key, path):
         if os.path.exists(path):
             self.directories[key] = path
+            self.version += 1
         else:
             raise ValueError(f"The path {path} does not exist.")
 
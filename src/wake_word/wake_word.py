@@ -1,7 +1,76 @@
+import asyncio
+import os
+import threading
+from collections import deque
+
+import numpy as np
 import pyaudio
 import pvporcupine
 import pvcobra
-import struct
+
+class AudioFrameReader(threading.Thread):
+    """
+    Reads microphone frames on a dedicated thread into a bounded ring buffer.
+
+    Reading on the asyncio thread means any event-loop stall (GC, response
+    handling) drops audio between reads and can miss the wake word. The
+    capture thread keeps draining PortAudio regardless; when the consumer
+    falls behind, the oldest frames are dropped so detection always runs on
+    fresh audio. The read() method matches pyaudio's stream.read signature,
+    so record_audio can consume from the same ring.
+    """
+
+    def __init__(self, stream, frame_length, max_frames=64):
+        super().__init__(daemon=True)
+        self.stream = stream
+        self.frame_length = frame_length
+        self.frames = deque(maxlen=max_frames)
+        self.ready = threading.Condition()
+        self.running = True
+        self._leftover = bytearray()
+        self.start()
+
+    def run(self):
+        # Best effort: give the capture thread real-time priority so the
+        # PortAudio reads aren't preempted (Linux only, needs privileges)
+        try:
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(1))
+        except (AttributeError, PermissionError, OSError):
+            pass
+
+        while self.running:
+            try:
+                chunk = self.stream.read(self.frame_length)
+            except Exception:
+                break
+            with self.ready:
+                self.frames.append(chunk)
+                self.ready.notify()
+
+    def read(self, num_frames):
+        """
+        Return num_frames 16-bit mono frames, blocking until available.
+        """
+        needed = num_frames * 2  # bytes per int16 sample
+        buf = self._leftover
+
+        while len(buf) < needed:
+            with self.ready:
+                while not self.frames and self.running:
+                    self.ready.wait(timeout=0.1)
+                if not self.frames:
+                    break
+                buf += self.frames.popleft()
+
+        self._leftover = buf[needed:]
+        return bytes(buf[:needed])
+
+    def close(self):
+        """Stop the capture thread and close the underlying stream."""
+        self.running = False
+        with self.ready:
+            self.ready.notify_all()
+        self.stream.close()
 
 def initialize_wake_word_detection(config):
     """
@@ -18,7 +87,7 @@ def initialize_wake_word_detection(config):
 
     # Initialize PyAudio for audio input
     pa = pyaudio.PyAudio()
-    audio_stream = pa.open(
+    mic_stream = pa.open(
         rate=config['RATE'],
         channels=config['CHANNELS'],
         format=config['FORMAT'],
@@ -26,20 +95,49 @@ def initialize_wake_word_detection(config):
         frames_per_buffer=config['CHUNK']
     )
 
+    # Hand the raw stream to a dedicated capture thread; callers read
+    # frames from its ring buffer instead of the PortAudio stream directly
+    audio_stream = AudioFrameReader(mic_stream, porcupine.frame_length)
+
     return porcupine, cobra, audio_stream, pa
 
 async def detect_wake_word(porcupine, audio_stream):
     """
     Detect wake word in the audio stream.
     """
-    # Read a frame of audio from the stream
-    pcm = audio_stream.read(porcupine.frame_length)
+    # Read a frame of audio from the stream, off the event loop - the
+    # ring read blocks for up to a frame (~32 ms)
+    pcm = await asyncio.get_running_loop().run_in_executor(
+        None, audio_stream.read, porcupine.frame_length
+    )
     
-    # Convert the audio data to the format expected by Porcupine
-    pcm = struct.unpack_from("h" * porcupine.frame_length, pcm)
+    # A zero-copy int16 view instead of unpacking a Python tuple of
+    # frame_length ints per frame; Porcupine accepts array-like input
+    pcm = np.frombuffer(pcm, dtype=np.int16)
 
     # Process the audio frame with Porcupine to detect the wake word
     keyword_index = porcupine.process(pcm)
 
     # Return True if the wake word is detected (keyword_index >= 0), False otherwise
-    return keyword_index >= 0
\ No newline at end of file
+    return keyword_index >= 0
+
+async def wait_for_wake_word(porcupine, audio_stream):
+    """
+    Block until the wake word is heard.
+
+    Runs the ~30 Hz detection loop with the per-frame lookups hoisted
+    into locals. Each frame read happens in the default executor: the
+    ring read blocks for up to a frame (~32 ms), and stalling the event
+    loop for that long per frame would starve concurrent work (warmup,
+    TTS tails). The executor hop also yields control between frames.
+    """
+    loop = asyncio.get_running_loop()
+    frame_length = porcupine.frame_length
+    read = audio_stream.read
+    frombuffer = np.frombuffer
+    process = porcupine.process
+
+    while True:
+        pcm = await loop.run_in_executor(None, read, frame_length)
+        if process(frombuffer(pcm, dtype=np.int16)) >= 0:
+            return
\ No newline at end of file